@@ -0,0 +1,122 @@
+from datetime import datetime
+from sqlalchemy import bindparam, delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import object_session
+from models import db, Product, Category, StockAlert
+from chunks import chunks
+
+ALERT_SORTS = {
+    "id": StockAlert.id,
+    "quantity": StockAlert.quantity,
+    "created_at": StockAlert.created_at
+}
+
+
+def refresh_alerts(product_ids, connection=None):
+    """Bring the alerts of the given products in line with their quantities.
+
+    Only these products are read, so the cost follows the number of
+    changed products, not the size of the catalogue. A product is low when
+    its quantity is at or below its own reorder_threshold, or its
+    category's when it has none. Products that no longer exist lose their
+    alert.
+    """
+    conn = connection if connection is not None else db.session
+    threshold = func.coalesce(Product.reorder_threshold, Category.reorder_threshold)
+    now = datetime.utcnow()
+    for chunk in chunks(sorted(set(product_ids))):
+        low = {
+            id: (user_id, quantity, limit)
+            for id, user_id, quantity, limit in conn.execute(
+                select(Product.id, Product.user_id, Product.quantity, threshold)
+                .outerjoin(Category, Category.id == Product.category_id)
+                .where(Product.id.in_(chunk))
+            )
+            if limit is not None and quantity <= limit
+        }
+        existing = {
+            product_id: (quantity, limit)
+            for product_id, quantity, limit in conn.execute(
+                select(StockAlert.product_id, StockAlert.quantity, StockAlert.threshold)
+                .where(StockAlert.product_id.in_(chunk))
+            )
+        }
+
+        cleared = [id for id in existing if id not in low]
+        if cleared:
+            conn.execute(
+                delete(StockAlert).where(StockAlert.product_id.in_(cleared))
+                .execution_options(synchronize_session=False)
+            )
+        raised = [
+            {"product_id": id, "user_id": user_id, "quantity": quantity, "threshold": limit,
+             "created_at": now, "updated_at": now}
+            for id, (user_id, quantity, limit) in low.items() if id not in existing
+        ]
+        if raised:
+            conn.execute(insert(StockAlert), raised)
+        changed = [
+            {"pid": id, "quantity": quantity, "threshold": limit, "updated_at": now}
+            for id, (_, quantity, limit) in low.items() if id in existing and existing[id] != (quantity, limit)
+        ]
+        if changed:
+            conn.execute(
+                update(StockAlert.__table__)
+                .where(StockAlert.__table__.c.product_id == bindparam('pid'))
+                .values(quantity=bindparam('quantity'), threshold=bindparam('threshold'),
+                        updated_at=bindparam('updated_at')),
+                changed
+            )
+
+
+def alert_rows(user_id):
+    """Column query of a tenant's open alerts with the product name, for GET /alerts."""
+    return db.session.query(
+        StockAlert.id, StockAlert.product_id, Product.name.label('product'),
+        StockAlert.quantity, StockAlert.threshold, StockAlert.created_at, StockAlert.updated_at
+    ).join(Product, Product.id == StockAlert.product_id).filter(StockAlert.user_id == user_id)
+
+
+# ORM writes (POST/PATCH/DELETE) are picked up from the flush; bulk paths
+# that issue UPDATEs directly call refresh_alerts themselves.
+
+def _track(session, key, value):
+    session.info.setdefault(key, set()).add(value)
+
+
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_delete')
+def _product_written(mapper, connection, target):
+    _track(object_session(target), 'alert_products', target.id)
+
+
+@event.listens_for(Product, 'after_update')
+def _product_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ('quantity', 'reorder_threshold', 'category_id')):
+        _track(object_session(target), 'alert_products', target.id)
+
+
+@event.listens_for(Category, 'after_update')
+def _category_updated(mapper, connection, target):
+    if inspect(target).attrs.reorder_threshold.history.has_changes():
+        _track(object_session(target), 'alert_categories', (target.user_id, target.id))
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _refresh_after_flush(session, flush_context):
+    product_ids = session.info.pop('alert_products', set())
+    category_ids = session.info.pop('alert_categories', set())
+    if not product_ids and not category_ids:
+        return
+    connection = session.connection()
+    for user_id, category_id in category_ids:
+        product_ids.update(connection.execute(
+            select(Product.id).where(Product.user_id == user_id, Product.category_id == category_id)
+        ).scalars())
+    refresh_alerts(product_ids, connection)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_tracked(session):
+    session.info.pop('alert_products', None)
+    session.info.pop('alert_categories', None)
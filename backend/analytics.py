@@ -0,0 +1,128 @@
+from datetime import timedelta
+from sqlalchemy import Integer, cast, func, select
+from models import db, Product, StockSnapshot
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it GET /analytics/stock answers 501
+    np = None
+
+# z-score for a 95% service level in the safety stock term
+SERVICE_Z = 1.65
+
+
+def _day_offset(column, start):
+    """Whole days from `start` to `column`, computed by the database."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return column - start
+    return cast(func.julianday(column) - func.julianday(start.isoformat()), Integer)
+
+
+def load_series(user_id, start, days):
+    """Return (product ids, quantities) for a tenant's daily snapshots from `start`.
+
+    quantities is a (products x days) float array. A day with no snapshot
+    carries the previous day's value forward; days before a product's
+    first snapshot stay NaN.
+    """
+    # The driver's tuples go straight into numpy: building SQLAlchemy rows
+    # and date objects for every snapshot would cost more than the maths.
+    result = db.session.connection().execute(
+        select(StockSnapshot.product_id, _day_offset(StockSnapshot.day, start), StockSnapshot.quantity)
+        .where(StockSnapshot.user_id == user_id, StockSnapshot.period == 'day',
+               StockSnapshot.day >= start, StockSnapshot.day < start + timedelta(days=days))
+    )
+    data = np.array(result.cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+    result.close()
+    ids, offsets, quantities = data[:, 0], data[:, 1], data[:, 2].astype(np.float64)
+
+    product_ids, rows_of = np.unique(ids, return_inverse=True)
+    series = np.full((len(product_ids), days), np.nan)
+    series[rows_of, offsets] = quantities
+
+    # Forward fill: index of the last observed day at or before each day
+    observed = np.where(np.isnan(series), 0, np.arange(days))
+    np.maximum.accumulate(observed, axis=1, out=observed)
+    series = series[np.arange(len(product_ids))[:, None], observed]
+    return product_ids, series
+
+
+def _mean_std(values):
+    """Row means and standard deviations ignoring NaN, 0 for rows with no values."""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    filled = np.where(valid, values, 0.0)
+    mean = np.divide(filled.sum(axis=1), count, out=np.zeros(len(values)), where=count > 0)
+    spread = np.where(valid, values - mean[:, None], 0.0)
+    std = np.sqrt(np.divide((spread ** 2).sum(axis=1), count, out=np.zeros(len(values)), where=count > 0))
+    return mean, std
+
+
+def _floats(values):
+    return [None if not np.isfinite(v) else v for v in np.round(values, 2).tolist()]
+
+
+def stock_analytics(user_id, today, days, window, lead_time, limit):
+    """Trend and reorder figures for every product with snapshots, riskiest first.
+
+    All products are computed together on one (products x days) array:
+    - depletion_per_day: mean daily consumption (drops in quantity;
+      restocks count as zero) over the last `window` days
+    - days_of_cover / stockout_date: current quantity at that rate
+    - reorder_point: expected demand over `lead_time` days plus safety
+      stock for its variability
+    - turnover: consumption over the period divided by average stock
+    """
+    start = today - timedelta(days=days - 1)
+    product_ids, series = load_series(user_id, start, days)
+
+    live = db.session.connection().execute(
+        select(Product.id, Product.quantity).where(Product.user_id == user_id).order_by(Product.id)
+    ).all()
+    live_ids, live_quantities = zip(*live) if live else ((), ())
+    live_ids = np.array(live_ids, dtype=np.int64)
+    live_quantities = np.array(live_quantities, dtype=np.float64)
+    position = np.searchsorted(live_ids, product_ids).clip(max=max(len(live_ids) - 1, 0))
+    exists = (live_ids[position] == product_ids) if len(live_ids) else np.zeros(len(product_ids), dtype=bool)
+    product_ids, series, current = product_ids[exists], series[exists], live_quantities[position[exists]]
+
+    consumption = np.clip(-np.diff(series, axis=1), 0, None)
+    rate, spread = _mean_std(consumption[:, -window:])
+    average, _ = _mean_std(series[:, -window:])
+    period_average, _ = _mean_std(series)
+    used = np.nansum(consumption, axis=1)
+
+    days_of_cover = np.divide(current, rate, out=np.full(len(rate), np.inf), where=rate > 0)
+    reorder_point = rate * lead_time + SERVICE_Z * spread * np.sqrt(lead_time)
+    turnover = np.divide(used, period_average, out=np.zeros(len(used)), where=period_average > 0)
+
+    order = np.lexsort((product_ids, days_of_cover))[:limit]
+    names = dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(product_ids[order].tolist())))
+    cover = days_of_cover[order]
+    items = [
+        {
+            "product_id": id,
+            "name": names.get(id),
+            "quantity": int(quantity),
+            "average_quantity": avg,
+            "depletion_per_day": depletion,
+            "days_of_cover": days_left,
+            "stockout_date": (today + timedelta(days=int(d))).isoformat() if np.isfinite(d) else None,
+            "reorder_point": point,
+            "below_reorder_point": bool(quantity <= point_raw) and point_raw > 0,
+            "turnover": turns
+        }
+        for id, quantity, avg, depletion, days_left, d, point, point_raw, turns in zip(
+            product_ids[order].tolist(), current[order].tolist(), _floats(average[order]),
+            _floats(rate[order]), _floats(cover), cover.tolist(), _floats(reorder_point[order]),
+            reorder_point[order].tolist(), _floats(turnover[order])
+        )
+    ]
+    return {
+        "as_of": today.isoformat(),
+        "days": days,
+        "window": window,
+        "lead_time": lead_time,
+        "products": len(product_ids),
+        "items": items
+    }
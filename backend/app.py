@@ -1,19 +1,72 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
 from flask_migrate import Migrate
 from flask_cors import CORS
-from models import db, User, Product, Category, Warehouse
+from sqlalchemy.orm import joinedload
+from models import db, User, Product, Category, Warehouse, StockMovement, StockAlert, Job
 from auth import token_required
+from json_provider import FastJSONProvider
+from pagination import keyset_page
+from fields import PRODUCTS, CATEGORIES, WAREHOUSES
+from importer import detect_format, import_products
+from stats import get_summary
+from versions import touch_tenant, conditional
+from movements import MovementError, parse_movement, apply_movements
+from search import search_products, include_object
+from sync import changes_since
+from bulk import resolve_ids, validate_changes, per_id_results, bulk_update, bulk_delete, delete_products_where
+from exporter import FORMATS as EXPORT_FORMATS, export_query, stream_products
+from metrics import init_metrics
+from passwords import PasswordPoolBusy
+from database import database_url, engine_options, replica_binds, init_database
+from replicas import init_replicas
+from reference import cached_response, name_maps
+from alerts import ALERT_SORTS, alert_rows
+from batch import parse_batch, run_batch
+from jobs import init_jobs, enqueue, exceeds_job_threshold
+from snapshots import init_snapshots, product_history
+from analytics import np, stock_analytics
+from datetime import datetime
 import os
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventorix.db'
+app.json = FastJSONProvider(app)
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_BINDS'] = replica_binds()
+app.config['READ_YOUR_WRITES_SECONDS'] = int(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+app.config['LOW_STOCK_THRESHOLD'] = int(os.getenv('LOW_STOCK_THRESHOLD', 10))
+app.config['TOKEN_CACHE_SIZE'] = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+app.config['TOKEN_CACHE_TTL'] = int(os.getenv('TOKEN_CACHE_TTL', 60))
+app.config['IMPORT_BATCH_SIZE'] = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+app.config['STATS_CACHE_TTL'] = int(os.getenv('STATS_CACHE_TTL', 30))
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+app.config['SLOW_QUERY_MS'] = int(os.getenv('SLOW_QUERY_MS', 200))
+app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.getenv('PASSWORD_HASH_QUEUE', 32))
+app.config['REFERENCE_CACHE_URL'] = os.getenv('REFERENCE_CACHE_URL')
+app.config['REFERENCE_CACHE_SIZE'] = int(os.getenv('REFERENCE_CACHE_SIZE', 10000))
+app.config['REFERENCE_CACHE_TTL'] = int(os.getenv('REFERENCE_CACHE_TTL', 300))
+app.config['BATCH_MAX_OPERATIONS'] = int(os.getenv('BATCH_MAX_OPERATIONS', 100))
+app.config['JOB_THRESHOLD'] = int(os.getenv('JOB_THRESHOLD', 10000))
+app.config['JOB_MAX_ATTEMPTS'] = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+app.config['JOB_RETRY_DELAY'] = int(os.getenv('JOB_RETRY_DELAY', 10))
+app.config['JOB_TIMEOUT'] = int(os.getenv('JOB_TIMEOUT', 600))
+app.config['JOB_POLL_INTERVAL'] = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+app.config['SNAPSHOT_DAILY_DAYS'] = int(os.getenv('SNAPSHOT_DAILY_DAYS', 90))
+app.config['SNAPSHOT_WEEKLY_DAYS'] = int(os.getenv('SNAPSHOT_WEEKLY_DAYS', 730))
 
 CORS(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, include_object=include_object)
 db.init_app(app)
+init_database(app, db)
+init_replicas(app)
+init_metrics(app)
+init_jobs(app)
+init_snapshots(app)
 
 
 @app.route("/")
@@ -21,6 +74,58 @@ def home():
     return {"message": "Inventorix API"}
 
 
+def parse_arg(args, key, cast):
+    value = args.get(key)
+    if value is None or value == '':
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"Invalid value for {key}")
+
+
+def apply_product_filters(query, args):
+    """Narrow a product query using the list endpoint's filter params."""
+    category_id = parse_arg(args, 'category_id', int)
+    warehouse_id = parse_arg(args, 'warehouse_id', int)
+    min_price = parse_arg(args, 'min_price', float)
+    max_price = parse_arg(args, 'max_price', float)
+    min_quantity = parse_arg(args, 'min_quantity', int)
+    max_quantity = parse_arg(args, 'max_quantity', int)
+
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    if warehouse_id is not None:
+        query = query.filter(Product.warehouse_id == warehouse_id)
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    if min_quantity is not None:
+        query = query.filter(Product.quantity >= min_quantity)
+    if max_quantity is not None:
+        query = query.filter(Product.quantity <= max_quantity)
+    if args.get('low_stock', '').lower() in ('1', 'true', 'yes'):
+        threshold = parse_arg(args, 'low_stock_threshold', int)
+        if threshold is None:
+            threshold = app.config['LOW_STOCK_THRESHOLD']
+        query = query.filter(Product.quantity <= threshold)
+    return query
+
+
+def retry_later(error):
+    response = jsonify({"error": str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+def accepted(job, **extra):
+    """202 pointing at the job that will do the work."""
+    response = jsonify({"job": job.to_dict(), **extra})
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response, 202
+
+
 #auth routes
 @app.route("/login", methods=["POST"])
 def login():
@@ -28,7 +133,13 @@ def login():
     username, password = data.get('username'), data.get('password')
 
     user = User.query.filter_by(username=username).first()
-    if user and user.authenticate(password):
+    try:
+        authenticated = user is not None and user.authenticate(password)
+    except PasswordPoolBusy as e:
+        return retry_later(e)
+    if authenticated:
+        if user in db.session.dirty:
+            db.session.commit()
         token = user.generate_token()
         return jsonify({"token": token, "user": user.to_dict()}), 200
 
@@ -48,6 +159,9 @@ def create_user():
         db.session.add(user)
         db.session.commit()
         return jsonify(user.to_dict()), 201
+    except PasswordPoolBusy as e:
+        db.session.rollback()
+        return retry_later(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
@@ -59,12 +173,47 @@ def get_user(current_user):
     return jsonify(current_user.to_dict()), 200
 
 
+def included_names(projection, keys, user_id):
+    """The tenant's cached id -> name maps, if the response includes any names."""
+    return name_maps(user_id) if any(key in projection.includes for key in keys) else None
+
+
+def projected_page(projection, user_id, sortable, apply_filters=None):
+    """One keyset page of rows limited to the request's ?fields= and ?include=."""
+    sort = request.args.get('sort', 'id').lstrip('-')
+    query, keys = projection.query(request.args, extra=[sort])
+    query = query.filter(projection.model.user_id == user_id)
+    if apply_filters:
+        query = apply_filters(query, request.args)
+    rows, next_cursor = keyset_page(query, projection.columns['id'], sortable)
+    names = included_names(projection, keys, user_id)
+    return {"items": [projection.serialize(row, keys, names) for row in rows], "next_cursor": next_cursor}
+
+
+def projected_detail(projection, label, user_id, id):
+    try:
+        query, keys = projection.query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    row = query.filter(projection.model.id == id, projection.model.user_id == user_id).first()
+    if not row:
+        return jsonify({"error": f"{label} not found"}), 404
+    return jsonify(projection.serialize(row, keys, included_names(projection, keys, user_id))), 200
+
+
 # categories routes
 @app.route("/categories", methods=["GET"])
 @token_required
+@conditional
+@cached_response
 def get_categories(current_user):
-    categories = Category.query.filter_by(user_id=current_user.id).all()
-    return jsonify([c.to_dict() for c in categories]), 200
+    try:
+        return jsonify(projected_page(
+            CATEGORIES, current_user.id,
+            {"id": Category.id, "name": Category.name}
+        )), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @app.route("/categories", methods=["POST"])
@@ -75,9 +224,11 @@ def create_category(current_user):
         category = Category(
             name=data['name'],
             in_stock=data.get('in_stock', True),
+            reorder_threshold=data.get('reorder_threshold'),
             user_id=current_user.id
         )
         db.session.add(category)
+        touch_tenant(current_user.id)
         db.session.commit()
         return jsonify(category.to_dict()), 201
     except Exception as e:
@@ -87,19 +238,22 @@ def create_category(current_user):
 
 @app.route("/categories/<int:id>", methods=["GET", "PATCH", "DELETE"])
 @token_required
+@conditional
+@cached_response
 def handle_category(current_user, id):
+    if request.method == "GET":
+        return projected_detail(CATEGORIES, "Category", current_user.id, id)
+
     category = Category.query.filter_by(id=id, user_id=current_user.id).first()
     if not category:
         return jsonify({"error": "Category not found"}), 404
 
-    if request.method == "GET":
-        return jsonify(category.to_dict()), 200
-
     if request.method == "PATCH":
         data = request.get_json()
         try:
             for key, value in data.items():
                 setattr(category, key, value)
+            touch_tenant(current_user.id)
             db.session.commit()
             return jsonify(category.to_dict()), 200
         except Exception as e:
@@ -107,16 +261,29 @@ def handle_category(current_user, id):
             return jsonify({"error": str(e)}), 400
 
     if request.method == "DELETE":
+        if exceeds_job_threshold(Product.query.filter_by(user_id=current_user.id, category_id=id).count()):
+            job = enqueue(current_user.id, 'delete_category', {"category_id": id})
+            db.session.commit()
+            return accepted(job)
+        delete_products_where(current_user.id, Product.category_id == id)
         db.session.delete(category)
+        touch_tenant(current_user.id)
         db.session.commit()
         return "", 204
 
 #warehouses routes
 @app.route("/warehouses", methods=["GET"])
 @token_required
+@conditional
+@cached_response
 def get_warehouses(current_user):
-    warehouses = Warehouse.query.filter_by(user_id=current_user.id).all()
-    return jsonify([w.to_dict() for w in warehouses]), 200
+    try:
+        return jsonify(projected_page(
+            WAREHOUSES, current_user.id,
+            {"id": Warehouse.id, "name": Warehouse.name, "location": Warehouse.location}
+        )), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @app.route("/warehouses", methods=["POST"])
@@ -131,6 +298,7 @@ def create_warehouse(current_user):
             user_id=current_user.id
         )
         db.session.add(warehouse)
+        touch_tenant(current_user.id)
         db.session.commit()
         return jsonify(warehouse.to_dict()), 201
     except Exception as e:
@@ -140,19 +308,22 @@ def create_warehouse(current_user):
 
 @app.route("/warehouses/<int:id>", methods=["GET", "PATCH", "DELETE"])
 @token_required
+@conditional
+@cached_response
 def handle_warehouse(current_user, id):
+    if request.method == "GET":
+        return projected_detail(WAREHOUSES, "Warehouse", current_user.id, id)
+
     warehouse = Warehouse.query.filter_by(id=id, user_id=current_user.id).first()
     if not warehouse:
         return jsonify({"error": "Warehouse not found"}), 404
 
-    if request.method == "GET":
-        return jsonify(warehouse.to_dict()), 200
-
     if request.method == "PATCH":
         data = request.get_json()
         try:
             for key, value in data.items():
                 setattr(warehouse, key, value)
+            touch_tenant(current_user.id)
             db.session.commit()
             return jsonify(warehouse.to_dict()), 200
         except Exception as e:
@@ -160,16 +331,44 @@ def handle_warehouse(current_user, id):
             return jsonify({"error": str(e)}), 400
 
     if request.method == "DELETE":
+        if exceeds_job_threshold(Product.query.filter_by(user_id=current_user.id, warehouse_id=id).count()):
+            job = enqueue(current_user.id, 'delete_warehouse', {"warehouse_id": id})
+            db.session.commit()
+            return accepted(job)
+        delete_products_where(current_user.id, Product.warehouse_id == id)
         db.session.delete(warehouse)
+        touch_tenant(current_user.id)
         db.session.commit()
         return "", 204
     
 #products routes
+PRODUCT_SORTS = {
+    "id": Product.id,
+    "created_at": Product.created_at,
+    "name": Product.name,
+    "price": Product.price,
+    "quantity": Product.quantity
+}
+
+
+def product_query(user_id):
+    """Products for a tenant with category and warehouse joined in, so to_dict never lazy-loads."""
+    return Product.query.options(
+        joinedload(Product.category),
+        joinedload(Product.warehouse)
+    ).filter_by(user_id=user_id)
+
+
 @app.route("/products", methods=["GET"])
 @token_required
+@conditional
 def get_products(current_user):
-    products = Product.query.filter_by(user_id=current_user.id).all()
-    return jsonify([p.to_dict() for p in products]), 200
+    try:
+        return jsonify(projected_page(
+            PRODUCTS, current_user.id, PRODUCT_SORTS, apply_product_filters
+        )), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @app.route("/products", methods=["POST"])
@@ -181,11 +380,13 @@ def create_product(current_user):
             name=data["name"],
             price=data["price"],
             quantity=data.get("quantity", 0),
+            reorder_threshold=data.get("reorder_threshold"),
             category_id=data["category_id"],
             warehouse_id=data["warehouse_id"],  # ✅ direct FK now
             user_id=current_user.id
         )
         db.session.add(product)
+        touch_tenant(current_user.id)
         db.session.commit()
         return jsonify(product.to_dict()), 201
     except Exception as e:
@@ -193,22 +394,110 @@ def create_product(current_user):
         return jsonify({"error": str(e)}), 400
 
 
+@app.route("/products/import", methods=["POST"])
+@token_required
+def bulk_import_products(current_user):
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, content_type = upload.stream, upload.filename, upload.content_type
+    else:
+        stream, filename, content_type = request.stream, None, request.content_type
+    try:
+        fmt = detect_format(request.args.get('format'), filename, content_type)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    report = import_products(stream, fmt, current_user.id, app.config['IMPORT_BATCH_SIZE'])
+    return jsonify(report.to_dict()), 200
+
+
+@app.route("/products/export", methods=["GET"])
+@token_required
+def export_products(current_user):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    try:
+        query, keys = export_query(current_user.id, request.args)
+        stmt = apply_product_filters(query, request.args).statement
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    names = included_names(PRODUCTS, keys, current_user.id)
+
+    compress = request.accept_encodings['gzip'] > 0
+    response = Response(
+        stream_with_context(stream_products(stmt, keys, names, fmt, compress)),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=products.{fmt}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@app.route("/products/bulk", methods=["PATCH", "DELETE"])
+@token_required
+def bulk_products(current_user):
+    data = request.get_json() or {}
+    try:
+        ids, owned = resolve_ids(current_user.id, data, apply_product_filters)
+        if request.method == "PATCH":
+            changes = validate_changes(current_user.id, data.get('set'))
+        if exceeds_job_threshold(len(owned)):
+            if request.method == "PATCH":
+                job = enqueue(current_user.id, 'bulk_update', {"ids": sorted(owned), "set": changes})
+            else:
+                job = enqueue(current_user.id, 'bulk_delete', {"ids": sorted(owned)})
+            db.session.commit()
+            return accepted(job, results=per_id_results(ids, owned, "queued"))
+        if request.method == "PATCH":
+            count = bulk_update(current_user.id, owned, changes)
+            status = "updated"
+        else:
+            count = bulk_delete(current_user.id, owned)
+            status = "deleted"
+        if count:
+            touch_tenant(current_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({status: count, "results": per_id_results(ids, owned, status)}), 200
+
+
+@app.route("/products/search", methods=["GET"])
+@token_required
+@conditional
+def search(current_user):
+    try:
+        query, keys = PRODUCTS.query(request.args)
+        rows, next_cursor = search_products(current_user.id, request.args.get('q'), request.args, query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    names = included_names(PRODUCTS, keys, current_user.id)
+    return jsonify({"items": [PRODUCTS.serialize(row, keys, names) for row in rows], "next_cursor": next_cursor}), 200
+
+
 @app.route("/products/<int:id>", methods=["GET", "PATCH", "DELETE"])
 @token_required
+@conditional
 def handle_product(current_user, id):
-    product = Product.query.filter_by(id=id, user_id=current_user.id).first()
+    if request.method == "GET":
+        return projected_detail(PRODUCTS, "Product", current_user.id, id)
+
+    product = product_query(current_user.id).filter_by(id=id).first()
     if not product:
         return jsonify({"error": "Product not found"}), 404
 
-    if request.method == "GET":
-        return jsonify(product.to_dict()), 200
-
     if request.method == "PATCH":
         data = request.get_json()
         try:
-            for key in ["name", "price", "quantity", "category_id", "warehouse_id"]:
+            for key in ["name", "price", "quantity", "reorder_threshold", "category_id", "warehouse_id"]:
                 if key in data:
                     setattr(product, key, data[key])
+            touch_tenant(current_user.id)
             db.session.commit()
             return jsonify(product.to_dict()), 200
         except Exception as e:
@@ -218,6 +507,7 @@ def handle_product(current_user, id):
     if request.method == "DELETE":
         try:
             db.session.delete(product)
+            touch_tenant(current_user.id)
             db.session.commit()
             return "", 204
         except Exception as e:
@@ -225,9 +515,90 @@ def handle_product(current_user, id):
             return jsonify({"error": str(e)}), 400
 
 
+def record_movements(current_user, payload, product_id=None):
+    items = payload if isinstance(payload, list) else [payload]
+    if not items:
+        return jsonify({"error": "No movements given"}), 400
+    try:
+        movements = [parse_movement(item, product_id) for item in items]
+        recorded = apply_movements(current_user.id, movements)
+        touch_tenant(current_user.id)
+        db.session.commit()
+    except MovementError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    return jsonify([m.to_dict() for m in recorded]), 201
+
+
+@app.route("/products/<int:id>/movements", methods=["GET", "POST"])
+@token_required
+@conditional
+def product_movements(current_user, id):
+    if request.method == "POST":
+        return record_movements(current_user, request.get_json(), id)
+
+    if not Product.query.filter_by(id=id, user_id=current_user.id).first():
+        return jsonify({"error": "Product not found"}), 404
+    try:
+        movements, next_cursor = keyset_page(
+            StockMovement.query.filter_by(user_id=current_user.id, product_id=id),
+            StockMovement.id,
+            {"id": StockMovement.id},
+            default_sort='-id'
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"items": [m.to_dict() for m in movements], "next_cursor": next_cursor}), 200
+
+
+@app.route("/products/<int:id>/history", methods=["GET"])
+@token_required
+def get_product_history(current_user, id):
+    if not Product.query.filter_by(id=id, user_id=current_user.id).first():
+        return jsonify({"error": "Product not found"}), 404
+    try:
+        snapshots, next_cursor = product_history(current_user.id, id, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"items": [snapshot.to_dict() for snapshot in snapshots], "next_cursor": next_cursor}), 200
+
+
+@app.route("/movements", methods=["POST"])
+@token_required
+def create_movements(current_user):
+    return record_movements(current_user, request.get_json())
+
+
+# alerts route
+@app.route("/alerts", methods=["GET"])
+@token_required
+@conditional
+def get_alerts(current_user):
+    try:
+        rows, next_cursor = keyset_page(alert_rows(current_user.id), StockAlert.id, ALERT_SORTS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"items": [row._asdict() for row in rows], "next_cursor": next_cursor}), 200
+
+
+# sync route
+@app.route("/sync", methods=["GET"])
+@token_required
+@conditional
+def sync(current_user):
+    try:
+        return jsonify(changes_since(current_user.id, request.args.get('since'), request.args)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
 # stats route
 @app.route("/stats", methods=["GET"])
 @token_required
+@conditional
 def stats(current_user):
     return jsonify({
         "total_products": Product.query.filter_by(user_id=current_user.id).count(),
@@ -236,5 +607,65 @@ def stats(current_user):
     }), 200
 
 
+@app.route("/stats/summary", methods=["GET"])
+@token_required
+@conditional
+def stats_summary(current_user):
+    try:
+        threshold = parse_arg(request.args, 'low_stock_threshold', int)
+        top = parse_arg(request.args, 'top', int)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if threshold is None:
+        threshold = app.config['LOW_STOCK_THRESHOLD']
+    # Any threshold below zero counts the same products as zero
+    threshold = max(threshold, 0)
+    top = min(max(top or 10, 1), 100)
+    return jsonify(get_summary(current_user.id, threshold, top)), 200
+
+
+# analytics route
+@app.route("/analytics/stock", methods=["GET"])
+@token_required
+def analytics_stock(current_user):
+    if np is None:
+        return jsonify({"error": "Analytics needs numpy installed"}), 501
+    try:
+        days = parse_arg(request.args, 'days', int) or 30
+        window = parse_arg(request.args, 'window', int) or 7
+        lead_time = parse_arg(request.args, 'lead_time', int) or 7
+        limit = parse_arg(request.args, 'limit', int) or 50
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    days = min(max(days, 2), app.config['SNAPSHOT_DAILY_DAYS'])
+    window = min(max(window, 1), days - 1)
+    lead_time = max(lead_time, 1)
+    limit = min(max(limit, 1), 1000)
+    today = datetime.utcnow().date()
+    return jsonify(stock_analytics(current_user.id, today, days, window, lead_time, limit)), 200
+
+
+# jobs route
+@app.route("/jobs/<int:id>", methods=["GET"])
+@token_required
+def get_job(current_user, id):
+    job = Job.query.filter_by(id=id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+# batch route
+@app.route("/batch", methods=["POST"])
+@token_required
+def batch(current_user):
+    try:
+        operations, atomic = parse_batch(request.get_json(), app.config['BATCH_MAX_OPERATIONS'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result = run_batch(current_user, operations, atomic)
+    return jsonify(result), 200 if result["committed"] else 400
+
+
 if __name__ == "__main__":
     app.run(port=5555, debug=True)
@@ -1,25 +1,141 @@
 from functools import wraps
-from flask import request, jsonify
-from models import User
+import time
+from flask import request, jsonify, current_app, has_app_context
+from sqlalchemy import event, inspect
+from cache import TTLCache
+from models import db, User
+from metrics import timed
+from replicas import route_reads
+
+TOKEN_MAX_AGE = 3600
+
+
+class CurrentUser:
+    """Lightweight identity handed to routes instead of a session-bound User."""
+    __slots__ = ('id', 'business_name', 'username', 'email', 'created_at')
+
+    def __init__(self, id, business_name, username, email, created_at):
+        self.id = id
+        self.business_name = business_name
+        self.username = username
+        self.email = email
+        self.created_at = created_at
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.business_name, user.username, user.email, user.created_at)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "business_name": self.business_name,
+            "username": self.username,
+            "email": self.email,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class TokenCache(TTLCache):
+    """Bounded LRU of verified tokens, indexed by user for invalidation.
+
+    An entry lives until the token itself expires or `ttl` seconds pass,
+    whichever comes first. The ttl bounds how long another worker can keep
+    serving an identity after the user was changed or deleted elsewhere.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._by_user = {}
+
+    def set(self, token, identity, expires_in):
+        super().set(token, identity, min(expires_in, self.ttl))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+
+    def _added(self, token, identity):
+        self._by_user.setdefault(identity.id, set()).add(token)
+
+    def _removed(self, token, identity):
+        tokens = self._by_user.get(identity.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[identity.id]
+
+
+def get_token_cache():
+    cache = current_app.extensions.get('token_cache')
+    if cache is None:
+        cache = TokenCache(
+            maxsize=current_app.config.get('TOKEN_CACHE_SIZE', 10000),
+            ttl=current_app.config.get('TOKEN_CACHE_TTL', 60)
+        )
+        current_app.extensions['token_cache'] = cache
+    return cache
+
+
+def load_identity(token, max_age=TOKEN_MAX_AGE):
+    """Resolve a bearer token to a CurrentUser, consulting the cache first."""
+    cache = get_token_cache()
+    identity = cache.get(token)
+    if identity is not None:
+        return identity
+
+    decoded = User.decode_token(token, max_age)
+    if not decoded:
+        return None
+    user_id, signed_at = decoded
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+
+    identity = CurrentUser.from_user(user)
+    cache.set(token, identity, signed_at.timestamp() + max_age - time.time())
+    return identity
+
+
+def _invalidate(user_id):
+    if has_app_context() and 'token_cache' in current_app.extensions:
+        current_app.extensions['token_cache'].invalidate_user(user_id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _invalidate(target.id)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    for key in ('_password_hash', 'username', 'email', 'business_name'):
+        if state.attrs[key].history.has_changes():
+            _invalidate(target.id)
+            return
+
 
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
-        
+
         # Get token from header
         if 'Authorization' in request.headers:
             auth_header = request.headers['Authorization']
             if auth_header.startswith('Bearer '):
                 token = auth_header.split(' ')[1]
-        
+
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
-        
-        current_user = User.verify_token(token)
+
+        with timed('auth'):
+            current_user = load_identity(token)
         if not current_user:
             return jsonify({'message': 'Token is invalid!'}), 401
-        
+
+        route_reads(current_user.id)
         return f(current_user, *args, **kwargs)
-    
+
     return decorated
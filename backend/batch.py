@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from flask import current_app
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+from models import db
+from versions import notify_tenant_change
+
+METHODS = ("POST", "PATCH", "DELETE")
+# Views a batch may call; reads, import/export and batches themselves are left out.
+ENDPOINTS = {
+    "create_category", "handle_category",
+    "create_warehouse", "handle_warehouse",
+    "create_product", "handle_product", "bulk_products",
+    "product_movements", "create_movements"
+}
+
+
+# Subclass the class db.session's sessionmaker made, which is the one the
+# session event listeners (versions, alerts, reference) are attached to.
+class BatchSession(db.session.session_factory.class_):
+    """Session on the batch's own connection.
+
+    With join_transaction_mode='create_savepoint', a handler's commit
+    releases a SAVEPOINT and its rollback returns to one, so the whole
+    batch stays in the connection's transaction.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        return self.bind
+
+
+def parse_batch(data, max_operations):
+    """Return (operations, atomic) from a POST /batch body, or raise ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError("Body must be an object")
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list")
+    if len(operations) > max_operations:
+        raise ValueError(f"A batch takes at most {max_operations} operations")
+    atomic = data.get('atomic', True)
+    if not isinstance(atomic, bool):
+        raise ValueError("atomic must be true or false")
+
+    refs = set()
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict):
+            raise ValueError(f"Operation {i} must be an object")
+        if op.get('method') not in METHODS:
+            raise ValueError(f"Operation {i}: method must be one of {', '.join(METHODS)}")
+        if not isinstance(op.get('path'), str) or not op['path'].startswith('/'):
+            raise ValueError(f"Operation {i}: path must start with /")
+        ref = op.get('ref')
+        if ref is not None:
+            if not isinstance(ref, str) or not ref:
+                raise ValueError(f"Operation {i}: ref must be a non-empty string")
+            if ref in refs:
+                raise ValueError(f"Operation {i}: ref {ref} is used twice")
+            refs.add(ref)
+    return operations, atomic
+
+
+class UnresolvedRef(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _resolve(value, refs, created):
+    """Replace "$ref" strings (whole values or path segments) with the id created under that ref.
+
+    `refs` are all the refs of the batch and `created` maps those already
+    run to their id (None if they failed); other strings are left alone.
+    """
+    if isinstance(value, dict):
+        return {key: _resolve(item, refs, created) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, refs, created) for item in value]
+    if isinstance(value, str) and value.startswith('$') and value[1:] in refs:
+        ref = value[1:]
+        if ref not in created:
+            raise UnresolvedRef(f"{value} refers to a later operation")
+        if created[ref] is None:
+            raise UnresolvedRef(f"Operation {ref} failed or created no id", 424)
+        return created[ref]
+    return value
+
+
+def _resolve_path(path, refs, created):
+    path, _, query = path.partition('?')
+    path = '/'.join(str(_resolve(part, refs, created)) for part in path.split('/'))
+    return f'{path}?{query}' if query else path
+
+
+@contextmanager
+def batch_transaction():
+    """Point db.session at one connection-level transaction for the duration; yields it."""
+    db.session.remove()
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    if connection.dialect.name == 'sqlite':
+        # pysqlite only opens a transaction before DML, so the first
+        # SAVEPOINT would start it and releasing that savepoint commit it.
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+    options = dict(db.session.session_factory.kw, bind=connection, join_transaction_mode='create_savepoint')
+    db.session.registry.set(BatchSession(**options))
+    try:
+        yield transaction
+    finally:
+        db.session.remove()
+        if transaction.is_active:
+            transaction.rollback()
+        connection.close()
+
+
+def _run_operation(current_user, op, refs, created):
+    """Dispatch one operation to its view and return (status, body)."""
+    try:
+        path = _resolve_path(op['path'], refs, created)
+        body = _resolve(op.get('body'), refs, created)
+    except UnresolvedRef as e:
+        return e.status, {"error": str(e)}
+
+    environ = EnvironBuilder(path=path, method=op['method'], json=body).get_environ()
+    try:
+        with current_app.request_context(environ) as ctx:
+            endpoint, view_args = ctx.url_adapter.match()
+            if endpoint not in ENDPOINTS:
+                return 404, {"error": f"{op['method']} {path} is not available in a batch"}
+            # The batch request is already authenticated; skip token_required.
+            view = current_app.view_functions[endpoint].__wrapped__
+            response = current_app.make_response(view(current_user, **view_args))
+    except HTTPException as e:
+        db.session.rollback()
+        return e.code, {"error": e.description}
+    except Exception as e:
+        db.session.rollback()
+        return 400, {"error": str(e)}
+
+    if response.status_code >= 400:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return response.status_code, response.get_json(silent=True)
+
+
+def run_batch(current_user, operations, atomic):
+    """Run operations in order in one transaction and return {"committed", "results"}.
+
+    An operation's "ref" names the id it creates, and later operations
+    use it as "$ref" in their path or body. Atomic batches stop at the
+    first failure and roll everything back; otherwise each failed
+    operation is rolled back on its own and the rest are committed.
+    """
+    results = []
+    refs = {op['ref'] for op in operations if op.get('ref') is not None}
+    created = {}
+    failed = False
+    with batch_transaction() as transaction:
+        for op in operations:
+            if failed and atomic:
+                results.append({"status": 424, "body": {"error": "Not run: an earlier operation failed"}})
+                continue
+            status, body = _run_operation(current_user, op, refs, created)
+            failed = failed or status >= 400
+            result = {"status": status, "body": body}
+            if op.get('ref') is not None:
+                result["ref"] = op['ref']
+                created[op['ref']] = body.get('id') if status < 400 and isinstance(body, dict) else None
+            results.append(result)
+
+        committed = not (failed and atomic)
+        if committed:
+            transaction.commit()
+
+    # Each handler's commit only released a savepoint, so caches keyed on
+    # the tenant are told again once the batch is really committed.
+    if committed and any(result["status"] < 400 for result in results):
+        notify_tenant_change(current_user.id)
+    return {"committed": committed, "results": results}
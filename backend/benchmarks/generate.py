@@ -0,0 +1,150 @@
+"""Populate the database with synthetic tenants for load testing.
+
+Run from backend/:
+    python -m benchmarks.generate --tenants 10000 --products 2000000 --distribution zipf
+
+Tenants are named bench<n> (email bench<n>@example.com) and all share
+the password "benchmark". Rows are written with executemany INSERTs in
+batches, bypassing the ORM unit of work, so a million products takes
+well under a minute on SQLite. Existing bench tenants are kept and new
+ones are numbered after them; pass --reset to start from empty tables.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+from app import app
+from models import db, User, Category, Warehouse, Product
+
+PASSWORD = "benchmark"
+CATEGORY_NAMES = ["Electronics", "Furniture", "Office Supplies", "Hardware", "Cleaning", "Packaging",
+                  "Tools", "Safety", "Kitchen", "Lighting", "Networking", "Storage"]
+LOCATIONS = ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Thika", "Malindi", "Kitale"]
+WORDS = ["Steel", "Compact", "Heavy Duty", "Wireless", "Premium", "Basic", "Large", "Mini", "Classic",
+         "Pro", "Eco", "Portable", "Industrial", "Smart", "Deluxe", "Standard"]
+ITEMS = ["Chair", "Desk", "Cable", "Router", "Drill", "Lamp", "Box", "Tape", "Printer", "Monitor",
+         "Shelf", "Glove", "Helmet", "Kettle", "Switch", "Battery", "Ladder", "Cart", "Bin", "Fan"]
+
+
+def products_per_tenant(tenants, total, distribution, skew, rng):
+    """Split `total` products over tenants; zipf gives a few very large tenants and a long tail."""
+    if distribution == "uniform":
+        weights = [1.0] * tenants
+    else:
+        weights = [1.0 / (rank ** skew) for rank in range(1, tenants + 1)]
+        rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for i in rng.sample(range(tenants), total - sum(counts)):
+        counts[i] += 1
+    return counts
+
+
+def product_rows(user_id, count, category_ids, warehouse_ids, low_stock_ratio, now, rng):
+    for _ in range(count):
+        created = now - timedelta(seconds=rng.randrange(365 * 86400))
+        if rng.random() < low_stock_ratio:
+            quantity = rng.randint(0, 10)
+        else:
+            quantity = int(rng.expovariate(1 / 80)) + 11
+        yield {
+            "name": f"{rng.choice(WORDS)} {rng.choice(ITEMS)} {rng.randrange(100000)}",
+            "price": round(rng.lognormvariate(3.5, 1.2), 2),
+            "quantity": quantity,
+            "created_at": created,
+            "updated_at": created,
+            "category_id": rng.choice(category_ids) if category_ids else None,
+            "warehouse_id": rng.choice(warehouse_ids) if warehouse_ids else None,
+            "user_id": user_id
+        }
+
+
+def flush(model, rows):
+    if rows:
+        db.session.execute(insert(model), rows)
+        db.session.commit()
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(PASSWORD)
+
+    if args.reset:
+        db.drop_all()
+        db.create_all()
+    first_id = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    first = db.session.query(func.count(User.id)).filter(User.username.like('bench%')).scalar() + 1
+
+    users = [{
+        "business_name": f"Bench Tenant {n}",
+        "username": f"bench{n}",
+        "email": f"bench{n}@example.com",
+        "_password_hash": password_hash,
+        "created_at": now,
+        "data_version": 0
+    } for n in range(first, first + args.tenants)]
+    for i in range(0, len(users), args.batch_size):
+        flush(User, users[i:i + args.batch_size])
+    user_ids = [id for (id,) in db.session.query(User.id).filter(User.id >= first_id).order_by(User.id)]
+
+    categories, warehouses = [], []
+    for user_id in user_ids:
+        for name in rng.sample(CATEGORY_NAMES, min(args.categories, len(CATEGORY_NAMES))):
+            categories.append({"name": name, "in_stock": True, "updated_at": now, "user_id": user_id})
+        for n in range(args.warehouses):
+            warehouses.append({
+                "name": f"Warehouse {n + 1}", "location": rng.choice(LOCATIONS),
+                "supplier": f"Supplier {rng.randrange(50)}", "updated_at": now, "user_id": user_id
+            })
+    for i in range(0, len(categories), args.batch_size):
+        flush(Category, categories[i:i + args.batch_size])
+    for i in range(0, len(warehouses), args.batch_size):
+        flush(Warehouse, warehouses[i:i + args.batch_size])
+
+    category_ids, warehouse_ids = {}, {}
+    for id, user_id in db.session.query(Category.id, Category.user_id).filter(Category.user_id >= first_id):
+        category_ids.setdefault(user_id, []).append(id)
+    for id, user_id in db.session.query(Warehouse.id, Warehouse.user_id).filter(Warehouse.user_id >= first_id):
+        warehouse_ids.setdefault(user_id, []).append(id)
+
+    counts = products_per_tenant(len(user_ids), args.products, args.distribution, args.skew, rng)
+    batch = []
+    for user_id, count in zip(user_ids, counts):
+        for row in product_rows(user_id, count, category_ids.get(user_id), warehouse_ids.get(user_id),
+                                args.low_stock_ratio, now, rng):
+            batch.append(row)
+            if len(batch) >= args.batch_size:
+                flush(Product, batch)
+                batch = []
+    flush(Product, batch)
+    return first, user_ids, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=100000, help="total products across all tenants")
+    parser.add_argument("--categories", type=int, default=6, help="categories per tenant")
+    parser.add_argument("--warehouses", type=int, default=3, help="warehouses per tenant")
+    parser.add_argument("--distribution", choices=["zipf", "uniform"], default="zipf",
+                        help="how products are spread over tenants")
+    parser.add_argument("--skew", type=float, default=1.1, help="zipf exponent; higher means bigger top tenants")
+    parser.add_argument("--low-stock-ratio", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with app.app_context():
+        first, user_ids, counts = generate(args)
+    elapsed = time.perf_counter() - start
+    print(f"{len(user_ids)} tenants (bench{first}..bench{first + len(user_ids) - 1}), {sum(counts)} products "
+          f"in {elapsed:.1f}s; largest tenant has {max(counts)} products")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the old and new serialization paths for a page of products.
+
+Run from backend/:  python -m benchmarks.json_serialization [page size]
+
+"before" is what GET /products did originally: ORM objects, to_dict()
+and the stdlib encoder. "after" is the current list path: column rows
+encoded by FastJSONProvider (orjson when installed). No database is
+needed; the objects are built in memory, so this measures
+serialization alone.
+"""
+import sys
+import time
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from app import app
+from json_provider import FastJSONProvider, orjson
+from models import Product, Category, Warehouse
+
+
+def build_page(size):
+    category = Category(id=1, name="Electronics", in_stock=True, user_id=1)
+    warehouse = Warehouse(id=1, name="Main Warehouse", location="Nairobi", supplier="Primary Supplier", user_id=1)
+    now = datetime.utcnow()
+    products, rows = [], []
+    for i in range(size):
+        product = Product(
+            id=i, name=f"Product {i}", price=10.0 + i, quantity=i % 40,
+            created_at=now, updated_at=now, category_id=1, warehouse_id=1, user_id=1
+        )
+        product.category = category
+        product.warehouse = warehouse
+        products.append(product)
+        rows.append({
+            "id": i, "name": f"Product {i}", "price": 10.0 + i, "quantity": i % 40,
+            "created_at": now, "updated_at": now, "category_id": 1, "warehouse_id": 1,
+            "category": "Electronics", "warehouse": "Main Warehouse"
+        })
+    return products, rows
+
+
+def rate(fn, seconds=2.0):
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    products, rows = build_page(size)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    with app.app_context():
+        before = rate(lambda: stdlib.response({"items": [p.to_dict() for p in products], "next_cursor": None}))
+        after = rate(lambda: fast.response({"items": rows, "next_cursor": None}))
+
+    print(f"page size {size}, encoder: {'orjson' if orjson else 'stdlib json'}")
+    print(f"before (ORM to_dict + stdlib json): {before:10.1f} responses/sec")
+    print(f"after  (rows + FastJSONProvider):   {after:10.1f} responses/sec  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
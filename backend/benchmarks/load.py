@@ -0,0 +1,209 @@
+"""Drive the API's main endpoints and report latency percentiles and throughput.
+
+Run from backend/ after populating the database with benchmarks.generate:
+    python -m benchmarks.load                         # in-process, through the Flask test client
+    python -m benchmarks.load --url http://127.0.0.1:8000 --concurrency 16   # against gunicorn
+
+Each scenario sends --requests requests spread over --tenants bench
+tenants, after a short warm-up. Results print as a table; --json writes
+them to a file so two runs can be compared.
+"""
+import argparse
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+PASSWORD = "benchmark"
+
+
+class TestClientTarget:
+    """Sends requests through app.test_client(); no server needed."""
+
+    def __init__(self):
+        from app import app
+        self.client = app.test_client()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HTTPTarget:
+    """Sends requests over HTTP, one keep-alive connection per thread."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        for attempt in (1, 2):
+            conn = getattr(self.local, "conn", None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self.local.conn = None
+                if attempt == 2:
+                    raise
+
+
+class Tenant:
+    def __init__(self, username, token, product_ids, category_ids, warehouse_ids):
+        self.username = username
+        self.token = token
+        self.product_ids = product_ids
+        self.category_ids = category_ids
+        self.warehouse_ids = warehouse_ids
+
+
+def login(target, username):
+    status, body = target.request("POST", "/login", body={"username": username, "password": PASSWORD})
+    if status != 200:
+        raise SystemExit(f"login failed for {username} ({status}); run benchmarks.generate first")
+    return json.loads(body)["token"]
+
+
+def ids(target, path, token):
+    status, body = target.request("GET", f"{path}?limit=200&fields=id&include=", token)
+    return [item["id"] for item in json.loads(body)["items"]] if status == 200 else []
+
+
+def prepare(target, count, rng):
+    """Log in as `count` bench tenants and note a page of their ids to work on."""
+    tenants = []
+    for n in range(1, count + 1):
+        username = f"bench{n}"
+        token = login(target, username)
+        tenants.append(Tenant(
+            username, token,
+            ids(target, "/products", token), ids(target, "/categories", token), ids(target, "/warehouses", token)
+        ))
+    rng.shuffle(tenants)
+    return tenants
+
+
+def scenarios(target):
+    def list_products(tenant, rng):
+        return target.request("GET", "/products?limit=50", tenant.token)
+
+    def product_detail(tenant, rng):
+        if not tenant.product_ids:
+            return list_products(tenant, rng)
+        return target.request("GET", f"/products/{rng.choice(tenant.product_ids)}", tenant.token)
+
+    def create_product(tenant, rng):
+        body = {
+            "name": f"Load test item {rng.randrange(10 ** 6)}", "price": 9.99, "quantity": 5,
+            "category_id": rng.choice(tenant.category_ids) if tenant.category_ids else None,
+            "warehouse_id": rng.choice(tenant.warehouse_ids) if tenant.warehouse_ids else None
+        }
+        return target.request("POST", "/products", tenant.token, body)
+
+    def patch_product(tenant, rng):
+        if not tenant.product_ids:
+            return create_product(tenant, rng)
+        path = f"/products/{rng.choice(tenant.product_ids)}"
+        return target.request("PATCH", path, tenant.token, {"quantity": rng.randint(0, 500)})
+
+    def stats_summary(tenant, rng):
+        return target.request("GET", "/stats/summary", tenant.token)
+
+    def login_request(tenant, rng):
+        return target.request("POST", "/login", body={"username": tenant.username, "password": PASSWORD})
+
+    return {
+        "list": list_products,
+        "detail": product_detail,
+        "create": create_product,
+        "patch": patch_product,
+        "stats": stats_summary,
+        "login": login_request
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def run(fn, tenants, requests, concurrency, seed):
+    def worker(i):
+        rng = random.Random(seed + i)
+        tenant = tenants[i % len(tenants)]
+        start = time.perf_counter()
+        status, _ = fn(tenant, rng)
+        return time.perf_counter() - start, status < 400
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(worker, range(requests)))
+    else:
+        results = [worker(i) for i in range(requests)]
+    wall = time.perf_counter() - start
+
+    latencies = sorted(seconds * 1000 for seconds, _ in results)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "throughput": requests / wall
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server; default is the in-process test client")
+    parser.add_argument("--tenants", type=int, default=50, help="bench tenants to spread requests over")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--scenarios", default="list,detail,create,patch,stats,login",
+                        help="comma-separated subset of list,detail,create,patch,stats,login")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    target = HTTPTarget(args.url) if args.url else TestClientTarget()
+    rng = random.Random(args.seed)
+    tenants = prepare(target, args.tenants, rng)
+    available = scenarios(target)
+
+    results = {}
+    print(f"{'scenario':<10}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for name in args.scenarios.split(","):
+        fn = available[name.strip()]
+        if args.warmup:
+            run(fn, tenants, args.warmup, args.concurrency, args.seed)
+        r = results[name] = run(fn, tenants, args.requests, args.concurrency, args.seed)
+        print(f"{name:<10}{r['requests']:>9}{r['errors']:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['throughput']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"url": args.url, "concurrency": args.concurrency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
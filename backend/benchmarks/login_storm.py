@@ -0,0 +1,82 @@
+"""Measure GET /products latency while other clients hammer POST /login.
+
+Run from backend/ after benchmarks.generate:  python -m benchmarks.login_storm [storm threads]
+
+Serves the app on a local threaded server, then probes /products with
+and without a login storm, first hashing inline (PASSWORD_HASH_WORKERS=0,
+the old behaviour) and then on the process pool. With the pool, the
+storm can only use its configured number of processes, so probe latency
+should stay close to the quiet baseline.
+"""
+import logging
+import sys
+import threading
+import time
+from werkzeug.serving import make_server
+from app import app
+from benchmarks.load import HTTPTarget, PASSWORD, login, percentile
+
+PROBES = 200
+
+
+def probe(target, token):
+    latencies = []
+    for _ in range(PROBES):
+        start = time.perf_counter()
+        target.request("GET", "/products?limit=50", token)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99)
+
+
+def storm(target, threads, stop):
+    counts = []
+
+    def hammer():
+        n = 0
+        while not stop.is_set():
+            target.request("POST", "/login", body={"username": "bench1", "password": PASSWORD})
+            n += 1
+        counts.append(n)
+
+    workers = [threading.Thread(target=hammer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return workers, counts
+
+
+def measure(target, token, threads):
+    quiet = probe(target, token)
+    stop = threading.Event()
+    workers, counts = storm(target, threads, stop)
+    time.sleep(0.5)
+    start = time.perf_counter()
+    loud = probe(target, token)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return quiet, loud, sum(counts) / elapsed
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    pool_workers = app.config['PASSWORD_HASH_WORKERS'] or 2
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    target = HTTPTarget(f"http://127.0.0.1:{server.server_port}")
+
+    print(f"{threads} login threads, {PROBES} probes of GET /products per phase")
+    for label, workers in (("inline", 0), (f"pool({pool_workers})", pool_workers)):
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        app.extensions.pop('password_pool', None)
+        token = login(target, "bench1")
+        (q50, q95, q99), (l50, l95, l99), logins = measure(target, token, threads)
+        print(f"{label:<10} quiet p50/p95/p99 {q50:6.1f} {q95:6.1f} {q99:6.1f} ms   "
+              f"storm {l50:6.1f} {l95:6.1f} {l99:6.1f} ms   ({logins:.0f} logins/s)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from datetime import datetime
+from sqlalchemy import delete, insert, update
+from models import db, Product, Category, Warehouse, Tombstone, check_name, check_price, check_reorder_threshold
+from chunks import CHUNK_SIZE, chunks
+from alerts import refresh_alerts
+from versions import touch_tenant
+
+UPDATABLE = ("name", "price", "quantity", "category_id", "warehouse_id", "reorder_threshold")
+# Changes that can raise or clear a reorder alert
+ALERT_FIELDS = {"quantity", "category_id", "reorder_threshold"}
+
+
+def resolve_ids(user_id, payload, apply_filters):
+    """Return (requested ids, ids owned by the tenant) from an `ids` list or a `filter` object.
+
+    `apply_filters` is the list endpoint's filter function, so a filter
+    selects exactly the products GET /products would return.
+    """
+    if 'ids' in payload:
+        ids = payload['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValueError("ids must be a list of integers")
+        ids = list(dict.fromkeys(ids))
+        owned = set()
+        for chunk in chunks(ids):
+            owned.update(
+                id for (id,) in db.session.query(Product.id)
+                .filter(Product.user_id == user_id, Product.id.in_(chunk))
+            )
+        return ids, owned
+
+    if 'filter' in payload:
+        if not isinstance(payload['filter'], dict):
+            raise ValueError("filter must be an object")
+        args = {key: str(value) for key, value in payload['filter'].items()}
+        query = apply_filters(db.session.query(Product.id).filter(Product.user_id == user_id), args)
+        ids = [id for (id,) in query.order_by(Product.id)]
+        return ids, set(ids)
+
+    raise ValueError("Provide either ids or filter")
+
+
+def validate_changes(user_id, changes):
+    """Check bulk PATCH values with the same rules as a single product update."""
+    if not isinstance(changes, dict) or not changes:
+        raise ValueError("set must be a non-empty object")
+    unknown = set(changes) - set(UPDATABLE)
+    if unknown:
+        raise ValueError(f"Cannot update: {', '.join(sorted(unknown))}")
+
+    if 'name' in changes:
+        check_name(changes['name'])
+    if 'price' in changes:
+        if not isinstance(changes['price'], (int, float)) or isinstance(changes['price'], bool):
+            raise ValueError("price must be a number")
+        check_price(changes['price'])
+    if 'quantity' in changes:
+        if not isinstance(changes['quantity'], int) or isinstance(changes['quantity'], bool):
+            raise ValueError("quantity must be an integer")
+    if 'category_id' in changes:
+        if not Category.query.filter_by(id=changes['category_id'], user_id=user_id).first():
+            raise ValueError("Category not found")
+    if 'warehouse_id' in changes:
+        if not Warehouse.query.filter_by(id=changes['warehouse_id'], user_id=user_id).first():
+            raise ValueError("Warehouse not found")
+    if 'reorder_threshold' in changes:
+        check_reorder_threshold(changes['reorder_threshold'])
+    return changes
+
+
+def per_id_results(ids, owned, status):
+    return [{"id": id, "status": status if id in owned else "not_found"} for id in ids]
+
+
+def bulk_update(user_id, ids, changes):
+    """Apply `changes` to the given products with one UPDATE per chunk of ids."""
+    ids = sorted(ids)
+    for chunk in chunks(ids):
+        db.session.execute(
+            update(Product)
+            .where(Product.user_id == user_id, Product.id.in_(chunk))
+            .values(**changes)
+            .execution_options(synchronize_session=False)
+        )
+        if ALERT_FIELDS & set(changes):
+            refresh_alerts(chunk)
+    return len(ids)
+
+
+def bulk_delete(user_id, ids):
+    """Delete the given products, one chunk of ids at a time.
+
+    Their movements and alerts go with them through ON DELETE CASCADE, and
+    transfers that pointed at them are kept with target_product_id nulled.
+    """
+    ids = sorted(ids)
+    now = datetime.utcnow()
+    for chunk in chunks(ids):
+        db.session.execute(insert(Tombstone), [
+            {"entity": "product", "entity_id": id, "user_id": user_id, "deleted_at": now} for id in chunk
+        ])
+        db.session.execute(
+            delete(Product)
+            .where(Product.user_id == user_id, Product.id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+    return len(ids)
+
+
+def delete_products_where(user_id, criterion, chunk_size=CHUNK_SIZE, progress=None):
+    """Delete every product of the tenant matching `criterion`, committing after each chunk.
+
+    Used before deleting a warehouse or category, so the database never
+    has to cascade through more than one chunk of products at once and
+    each transaction stays short. If the request dies halfway, repeating
+    the delete finishes the job. progress(deleted so far) is called after
+    each commit.
+    """
+    total = 0
+    while True:
+        ids = [
+            id for (id,) in db.session.query(Product.id)
+            .filter(Product.user_id == user_id, criterion)
+            .order_by(Product.id).limit(chunk_size)
+        ]
+        if not ids:
+            return total
+        total += bulk_delete(user_id, ids)
+        touch_tenant(user_id)
+        db.session.commit()
+        if progress:
+            progress(total)
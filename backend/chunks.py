@@ -0,0 +1,7 @@
+CHUNK_SIZE = 1000
+
+
+def chunks(ids, size=CHUNK_SIZE):
+    """Split a list of ids into slices of at most `size`, to keep IN (...) lists and transactions bounded."""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
@@ -0,0 +1,103 @@
+import os
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+DEFAULT_URL = 'sqlite:///inventorix.db'
+
+
+def _normalize_url(url):
+    # postgres:// (as some hosts emit it) becomes postgresql://
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def database_url():
+    """DATABASE_URL from the environment, or the SQLite default."""
+    return _normalize_url(os.getenv('DATABASE_URL', DEFAULT_URL))
+
+
+def replica_binds():
+    """SQLALCHEMY_BINDS for the comma-separated DATABASE_REPLICA_URLS: replica1, replica2, ..."""
+    urls = [_normalize_url(url.strip()) for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    return {f'replica{i}': {'url': url, **engine_options(url)} for i, url in enumerate(urls, 1)}
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`, tuned from DB_* environment variables."""
+    url = make_url(url)
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    # In-memory SQLite uses a single shared connection, which takes no pool sizing.
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options['pool_size'] = int(os.getenv('DB_POOL_SIZE', 5))
+        options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+        options['pool_timeout'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {'application_name': os.getenv('DB_APPLICATION_NAME', 'inventorix')}
+        statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+        if statement_timeout:
+            connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+        options['connect_args'] = connect_args
+    return options
+
+
+def sqlite_pragmas():
+    """PRAGMAs run on every new SQLite connection.
+
+    WAL lets readers proceed while a writer holds the lock, and
+    synchronous=NORMAL is durable under WAL except against power loss
+    of the last commits. busy_timeout makes a blocked writer wait for the
+    lock instead of failing at once with "database is locked".
+    foreign_keys turns on the ON DELETE CASCADE / SET NULL actions, which
+    SQLite otherwise ignores.
+    """
+    return [
+        'PRAGMA foreign_keys=ON',
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    ]
+
+
+class RoutingSession(Session):
+    """db.session's class: reads go to `g.read_engine` when the request has one.
+
+    token_required sets it for GETs (see replicas.py). Flushes, INSERT/
+    UPDATE/DELETE and SELECT ... FOR UPDATE always use the primary, and a
+    request that has written stays on the primary for the rest of it.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context():
+            return engine
+        replica = g.get('read_engine')
+        if replica is None or engine is not self._db.engines.get(None):
+            return engine
+        if self._flushing or isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None:
+            g.read_engine = None
+            return engine
+        return replica
+
+
+def init_database(app, db):
+    """Run the SQLite PRAGMAs on each connection the app's engines open."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'sqlite':
+                continue
+            pragmas = sqlite_pragmas()
+
+            @event.listens_for(engine, 'connect')
+            def _set_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+                cursor.close()
@@ -0,0 +1,75 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from flask import current_app
+from models import db, Product
+from fields import PRODUCTS
+from json_provider import orjson
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+
+
+def export_query(user_id, args):
+    """Column-only query of a tenant's products and its output keys, limited to ?fields= and ?include=."""
+    query, keys = PRODUCTS.query(args)
+    return query.filter(Product.user_id == user_id).order_by(Product.id), keys
+
+
+def _csv_lines(records, keys):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(keys)
+    yield buffer.getvalue()
+    for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in record.values()
+        ])
+        yield buffer.getvalue()
+
+
+def _ndjson_lines(records):
+    dumps = current_app.json.dumps
+    # orjson is always compact; the stdlib fallback needs telling
+    options = {} if orjson is not None else {'separators': (',', ':')}
+    for record in records:
+        yield dumps(record, **options) + '\n'
+
+
+def _chunks(lines):
+    """Group small lines into ~64KB chunks so the response isn't one write per row."""
+    parts, size = [], 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(parts).encode()
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts).encode()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_products(stmt, keys, names, fmt, compress=False):
+    """Yield the encoded export body, fetching rows from a server-side cursor."""
+    rows = db.session.execute(stmt.execution_options(yield_per=YIELD_PER, stream_results=True))
+    records = (PRODUCTS.serialize(row, keys, names) for row in rows)
+    lines = _csv_lines(records, keys) if fmt == 'csv' else _ndjson_lines(records)
+    chunks = _chunks(lines)
+    return _gzip(chunks) if compress else chunks
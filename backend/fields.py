@@ -0,0 +1,70 @@
+from models import db, Product, Category, Warehouse
+
+
+def requested(args, key, allowed, default):
+    """Parse a comma-separated `fields`/`include` param into names from `allowed`."""
+    raw = args.get(key)
+    if raw is None:
+        return list(default)
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = names - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown {key}: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}")
+    return [name for name in allowed if name in names]
+
+
+class Projection:
+    """Column-restricted SELECT for a model, driven by ?fields= and ?include=.
+
+    Only the requested columns are selected. `id` is always returned.
+    Rows come back as plain tuples, never ORM objects. Includes map a
+    name to the id column it is resolved from; the names themselves come
+    from the tenant's cached name maps instead of a join.
+    """
+
+    def __init__(self, model, columns, includes=None):
+        self.model = model
+        self.columns = {column.key: column for column in columns}
+        self.includes = includes or {}
+
+    def query(self, args, extra=()):
+        """Return (query, output keys); `extra` columns are selected but not returned."""
+        fields = requested(args, 'fields', self.columns, self.columns)
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        includes = requested(args, 'include', self.includes, self.includes)
+
+        selected = list(fields)
+        for name in [*(self.includes[name] for name in includes), *extra]:
+            if name in self.columns and name not in selected:
+                selected.append(name)
+        query = db.session.query(*[self.columns[name] for name in selected]).select_from(self.model)
+        return query, fields + includes
+
+    def serialize(self, row, keys, names=None):
+        """Row to dict; `names` maps each include to {id: name}."""
+        return {
+            key: names[key].get(getattr(row, self.includes[key])) if key in self.includes else getattr(row, key)
+            for key in keys
+        }
+
+
+PRODUCTS = Projection(
+    Product,
+    [
+        Product.id, Product.name, Product.price, Product.quantity, Product.reorder_threshold,
+        Product.created_at, Product.updated_at,
+        Product.category_id, Product.warehouse_id
+    ],
+    {"category": "category_id", "warehouse": "warehouse_id"}
+)
+
+CATEGORIES = Projection(
+    Category,
+    [Category.id, Category.name, Category.in_stock, Category.reorder_threshold, Category.updated_at, Category.user_id]
+)
+
+WAREHOUSES = Projection(
+    Warehouse,
+    [Warehouse.id, Warehouse.name, Warehouse.location, Warehouse.supplier, Warehouse.updated_at, Warehouse.user_id]
+)
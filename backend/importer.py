@@ -0,0 +1,240 @@
+import csv
+import io
+import json
+from sqlalchemy import insert, update
+from models import db, Product, Category, Warehouse, check_name, check_price
+from versions import touch_tenant
+from alerts import refresh_alerts
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'ndjson')
+
+
+def detect_format(requested=None, filename=None, content_type=None):
+    """Pick csv or ndjson from an explicit format, the file extension or the content type."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unsupported format '{requested}'. Use csv or ndjson")
+        return requested
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if filename.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    raise ValueError("Could not detect the file format. Pass ?format=csv or ?format=ndjson")
+
+
+class UnreadableFile(ValueError):
+    """The upload can't be read past some point: it isn't UTF-8, or its CSV is malformed."""
+
+
+def iter_records(stream, fmt):
+    """Yield (line number, record dict) one row at a time from a binary stream.
+
+    Raises UnreadableFile if the stream stops decoding part way; rows
+    yielded before that are unaffected.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    line_no = 0
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            for record in reader:
+                line_no = reader.line_num
+                yield line_no, record
+        else:
+            for line_no, line in enumerate(text, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_no, None
+                    continue
+                yield line_no, record
+    except UnicodeDecodeError:
+        raise UnreadableFile(f"File is not valid UTF-8; stopped reading after line {line_no}")
+    except csv.Error as e:
+        raise UnreadableFile(f"Malformed CSV ({e}); stopped reading after line {line_no}")
+
+
+def build_lookups(user_id):
+    """Map the tenant's category and warehouse names (and ids) to ids."""
+    categories = {}
+    for id, name in db.session.query(Category.id, Category.name).filter_by(user_id=user_id):
+        categories[name] = id
+        categories[id] = id
+    warehouses = {}
+    for id, name in db.session.query(Warehouse.id, Warehouse.name).filter_by(user_id=user_id):
+        warehouses[name] = id
+        warehouses[id] = id
+    return categories, warehouses
+
+
+def _resolve(record, key, lookup, label):
+    raw_id = record.get(f'{key}_id')
+    if raw_id not in (None, ''):
+        try:
+            resolved = lookup.get(int(raw_id))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {key}_id")
+        if resolved is None:
+            raise ValueError(f"{label} {raw_id} not found")
+        return resolved
+    name = record.get(key)
+    if name in (None, ''):
+        raise ValueError(f"{key} or {key}_id is required")
+    resolved = lookup.get(str(name).strip())
+    if resolved is None:
+        raise ValueError(f"{label} '{name}' not found")
+    return resolved
+
+
+def parse_record(record, categories, warehouses):
+    """Turn one input record into column values, applying Product's validation rules."""
+    if not isinstance(record, dict):
+        raise ValueError("Malformed row")
+
+    name = record.get('name')
+    name = str(name).strip() if name is not None else ''
+    check_name(name)
+
+    if record.get('price') in (None, ''):
+        raise ValueError("price is required")
+    try:
+        price = float(record['price'])
+    except (TypeError, ValueError):
+        raise ValueError("price must be a number")
+    check_price(price)
+
+    quantity = record.get('quantity')
+    try:
+        quantity = int(quantity) if quantity not in (None, '') else 0
+    except (TypeError, ValueError):
+        raise ValueError("quantity must be an integer")
+
+    values = {
+        "name": name,
+        "price": price,
+        "quantity": quantity,
+        "category_id": _resolve(record, 'category', categories, 'Category'),
+        "warehouse_id": _resolve(record, 'warehouse', warehouses, 'Warehouse')
+    }
+
+    if record.get('id') not in (None, ''):
+        try:
+            values["id"] = int(record['id'])
+        except (TypeError, ValueError):
+            raise ValueError("Invalid id")
+    return values
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+def _flush_batch(user_id, inserts, updates, report):
+    """Write one batch; rows with an `id` update existing products."""
+    if updates:
+        owned = {
+            id for (id,) in db.session.query(Product.id)
+            .filter(Product.user_id == user_id, Product.id.in_([u["id"] for _, u in updates]))
+        }
+        for row, values in updates:
+            if values["id"] not in owned:
+                report.error(row, f"Product {values['id']} not found")
+        updates = [(row, values) for row, values in updates if values["id"] in owned]
+
+    _write_rows(user_id, inserts, updates, report)
+
+
+def _database_error(e):
+    """First line of the driver's message, without the SQL and parameters SQLAlchemy appends."""
+    message = str(getattr(e, 'orig', None) or e).strip().splitlines()
+    return message[0][:200] if message else e.__class__.__name__
+
+
+def _write_rows(user_id, inserts, updates, report):
+    """Commit rows in one transaction; when that fails, split them in half and retry.
+
+    Only the rows that fail on their own are reported, so one bad row
+    costs its batch a few extra round trips rather than all its rows.
+    """
+    try:
+        written = []
+        if inserts:
+            written += db.session.execute(
+                insert(Product).returning(Product.id), [dict(values, user_id=user_id) for _, values in inserts]
+            ).scalars().all()
+        if updates:
+            db.session.execute(update(Product), [values for _, values in updates])
+            written += [values["id"] for _, values in updates]
+        if written:
+            refresh_alerts(written)
+            touch_tenant(user_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        rows = inserts + updates
+        if len(rows) == 1:
+            report.error(rows[0][0], f"Could not save row: {_database_error(e)}")
+            return
+        mid = len(rows) // 2
+        split = max(mid - len(inserts), 0)
+        _write_rows(user_id, inserts[:mid], updates[:split], report)
+        _write_rows(user_id, inserts[mid:], updates[split:], report)
+        return
+    report.inserted += len(inserts)
+    report.updated += len(updates)
+
+
+def import_products(stream, fmt, user_id, batch_size=BATCH_SIZE):
+    """Stream product rows from `stream` into the tenant's catalogue in batches.
+
+    Each batch is committed on its own, so a bad batch never discards
+    rows already written and memory stays flat however large the file is.
+    A file that can't be read to the end keeps the rows read before the
+    problem and reports it as an error with no row.
+    """
+    categories, warehouses = build_lookups(user_id)
+    report = ImportReport()
+    inserts, updates = [], []
+
+    try:
+        for row, record in iter_records(stream, fmt):
+            try:
+                values = parse_record(record, categories, warehouses)
+            except (ValueError, KeyError) as e:
+                report.error(row, str(e))
+                continue
+            (updates if "id" in values else inserts).append((row, values))
+            if len(inserts) + len(updates) >= batch_size:
+                _flush_batch(user_id, inserts, updates, report)
+                inserts, updates = [], []
+    except UnreadableFile as e:
+        report.error(None, str(e))
+
+    if inserts or updates:
+        _flush_batch(user_id, inserts, updates, report)
+    return report
@@ -0,0 +1,262 @@
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update
+from models import db, Job, Product, Category, Warehouse
+from bulk import bulk_update, bulk_delete, delete_products_where, validate_changes
+from chunks import chunks
+from versions import touch_tenant
+
+logger = logging.getLogger('inventorix.jobs')
+
+_handlers = {}
+
+
+def handler(kind):
+    """Register fn(user_id, payload, progress) -> result dict as the runner for a job kind.
+
+    progress(done, total) records how far the job has got; handlers
+    commit their own work, ideally in chunks, so a retry can pick up
+    from where a failed attempt stopped.
+    """
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(user_id, kind, payload):
+    """Add a queued job to the session; the caller commits."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(
+        kind=kind, payload=payload, user_id=user_id,
+        max_attempts=current_app.config.get('JOB_MAX_ATTEMPTS', 3)
+    )
+    db.session.add(job)
+    return job
+
+
+def exceeds_job_threshold(count):
+    """Whether an operation over `count` products should run as a background job."""
+    threshold = current_app.config.get('JOB_THRESHOLD', 0)
+    return bool(threshold) and count > threshold
+
+
+def _requeue_stale(now):
+    """Put back running jobs whose worker stopped reporting (it crashed or was killed).
+
+    A job that has used all its attempts fails instead, so one that keeps
+    killing its worker (out of memory, say) isn't retried forever.
+    """
+    timeout = timedelta(seconds=current_app.config.get('JOB_TIMEOUT', 600))
+    stale = (Job.status == 'running', Job.locked_at < now - timeout)
+    db.session.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status='failed', locked_by=None, locked_at=None, finished_at=now,
+                error='Worker stopped responding on the last attempt')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Job)
+        .where(*stale)
+        .values(status='queued', locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim(worker):
+    """Mark the next due job as running for `worker` and return it, or None.
+
+    Picking and marking happen in one UPDATE, so two workers can never
+    claim the same job; on PostgreSQL, SKIP LOCKED lets them pass over
+    each other's rows instead of queueing behind them.
+    """
+    now = datetime.utcnow()
+    _requeue_stale(now)
+    candidate = (
+        select(Job.id)
+        .where(Job.status == 'queued', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+    )
+    if db.session.get_bind().dialect.name == 'postgresql':
+        candidate = candidate.with_for_update(skip_locked=True)
+    job_id = db.session.execute(
+        update(Job)
+        .where(Job.id == candidate.scalar_subquery(), Job.status == 'queued')
+        .values(status='running', attempts=Job.attempts + 1, locked_by=worker, locked_at=now,
+                started_at=now, error=None)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return db.session.get(Job, job_id) if job_id is not None else None
+
+
+def _progress(job_id):
+    def report(done, total=None):
+        db.session.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(progress_done=done, progress_total=total, locked_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    return report
+
+
+def run(job):
+    """Run a claimed job and record its result, or schedule a retry when it fails."""
+    job_id, kind, user_id, payload = job.id, job.kind, job.user_id, job.payload
+    fn = _handlers.get(kind)
+    try:
+        if fn is None:
+            raise LookupError(f"Unknown job kind: {kind}")
+        result = fn(user_id, payload, _progress(job_id))
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('job %s (%s) failed', job_id, kind)
+        job = db.session.get(Job, job_id)
+        job.error = str(e)
+        job.locked_by = job.locked_at = None
+        if fn is not None and job.attempts < job.max_attempts:
+            delay = current_app.config.get('JOB_RETRY_DELAY', 10) * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job
+
+    job = db.session.get(Job, job_id)
+    job.status = 'succeeded'
+    job.result = result
+    job.locked_by = job.locked_at = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def work(worker, poll_interval, burst=False):
+    """Claim and run jobs until stopped, or until the queue is empty when `burst` is set."""
+    while True:
+        job = claim(worker)
+        if job is None:
+            if burst:
+                return
+            time.sleep(poll_interval)
+            continue
+        logger.info('%s running job %s (%s)', worker, job.id, job.kind)
+        run(job)
+        # Objects from this job shouldn't pile up in the long-lived session.
+        db.session.remove()
+
+
+def _worker_process(worker, poll_interval, burst):
+    # Runs in a spawned process, which has to load the app itself.
+    from app import app
+    with app.app_context():
+        work(worker, poll_interval, burst)
+
+
+def init_jobs(app):
+    """Register the `flask jobs work` command on the app."""
+    jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+    @jobs_cli.command('work')
+    @click.option('--processes', default=1, show_default=True, help='Worker processes to run.')
+    @click.option('--poll', 'poll_interval', type=float, default=None,
+                  help='Seconds between polls of an empty queue (default JOB_POLL_INTERVAL).')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+    def work_command(processes, poll_interval, burst):
+        """Run queued jobs."""
+        if poll_interval is None:
+            poll_interval = app.config.get('JOB_POLL_INTERVAL', 1.0)
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        if processes <= 1:
+            work(name, poll_interval, burst)
+            return
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(target=_worker_process, args=(f'{name}/{i}', poll_interval, burst))
+            for i in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            for process in workers:
+                process.terminate()
+
+    app.cli.add_command(jobs_cli)
+
+
+# Job kinds. Each commits per chunk, so work done by a failed attempt
+# stays done and a retry only has what is left.
+
+@handler('delete_warehouse')
+def _delete_warehouse(user_id, payload, progress):
+    return _delete_with_products(user_id, Warehouse, Product.warehouse_id, payload['warehouse_id'], progress)
+
+
+@handler('delete_category')
+def _delete_category(user_id, payload, progress):
+    return _delete_with_products(user_id, Category, Product.category_id, payload['category_id'], progress)
+
+
+def _delete_with_products(user_id, model, column, id, progress):
+    parent = model.query.filter_by(id=id, user_id=user_id).first()
+    if parent is None:
+        return {"deleted_products": 0}
+    total = Product.query.filter(Product.user_id == user_id, column == id).count()
+    progress(0, total)
+    deleted = delete_products_where(user_id, column == id, progress=lambda done: progress(done, total))
+    db.session.delete(parent)
+    touch_tenant(user_id)
+    db.session.commit()
+    return {"deleted_products": deleted}
+
+
+@handler('bulk_update')
+def _bulk_update(user_id, payload, progress):
+    ids, changes = payload['ids'], payload['set']
+    # Re-checked, since a category or warehouse may have gone since enqueueing
+    validate_changes(user_id, changes)
+    done = 0
+    progress(done, len(ids))
+    for chunk in chunks(ids):
+        done += bulk_update(user_id, chunk, changes)
+        touch_tenant(user_id)
+        db.session.commit()
+        progress(done, len(ids))
+    return {"updated": done}
+
+
+@handler('bulk_delete')
+def _bulk_delete(user_id, payload, progress):
+    ids = payload['ids']
+    done = 0
+    progress(done, len(ids))
+    for chunk in chunks(ids):
+        # Skip what an earlier attempt already deleted, so tombstones aren't repeated
+        remaining = [
+            id for (id,) in db.session.query(Product.id)
+            .filter(Product.user_id == user_id, Product.id.in_(chunk))
+        ]
+        bulk_delete(user_id, remaining)
+        done += len(chunk)
+        touch_tenant(user_id)
+        db.session.commit()
+        progress(done, len(ids))
+    return {"deleted": done}
@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('inventorix.sql')
+
+# Upper bounds in seconds, as used by the Prometheus client libraries.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_collectors = []
+
+
+def collector(fn):
+    """Register fn() -> list of exposition lines, appended to GET /metrics."""
+    _collectors.append(fn)
+    return fn
+
+
+class Histogram:
+    """Cumulative-bucket histogram; callers hold the registry lock."""
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """Process-wide aggregates, keyed by (method, endpoint).
+
+    Each worker process keeps its own numbers; scrape every worker (or
+    run a single one) to see the whole picture.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.responses = {}
+        self.queries = {}
+        self.db_seconds = {}
+        self.slow_queries = 0
+
+    def record(self, method, endpoint, status, seconds, queries, db_seconds):
+        key = (method, endpoint)
+        with self._lock:
+            self.latency.setdefault(key, Histogram()).observe(seconds)
+            self.responses[key + (status,)] = self.responses.get(key + (status,), 0) + 1
+            self.queries[key] = self.queries.get(key, 0) + queries
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + db_seconds
+
+    def slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP inventorix_request_duration_seconds Request latency by endpoint.',
+                '# TYPE inventorix_request_duration_seconds histogram'
+            ]
+            for (method, endpoint), hist in sorted(self.latency.items()):
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                for bound, count in zip(BUCKETS, hist.counts):
+                    lines.append(f'inventorix_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'inventorix_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f'inventorix_request_duration_seconds_sum{{{labels}}} {hist.sum}')
+                lines.append(f'inventorix_request_duration_seconds_count{{{labels}}} {hist.count}')
+
+            lines += [
+                '# HELP inventorix_responses_total Responses by endpoint and status code.',
+                '# TYPE inventorix_responses_total counter'
+            ]
+            for (method, endpoint, status), count in sorted(self.responses.items()):
+                lines.append(f'inventorix_responses_total{{method="{method}",endpoint="{endpoint}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP inventorix_db_queries_total SQL statements executed while serving each endpoint.',
+                '# TYPE inventorix_db_queries_total counter'
+            ]
+            for (method, endpoint), count in sorted(self.queries.items()):
+                lines.append(f'inventorix_db_queries_total{{method="{method}",endpoint="{endpoint}"}} {count}')
+
+            lines += [
+                '# HELP inventorix_db_seconds_total Time spent in SQL statements while serving each endpoint.',
+                '# TYPE inventorix_db_seconds_total counter'
+            ]
+            for (method, endpoint), seconds in sorted(self.db_seconds.items()):
+                lines.append(f'inventorix_db_seconds_total{{method="{method}",endpoint="{endpoint}"}} {seconds}')
+
+            lines += [
+                '# HELP inventorix_slow_queries_total SQL statements slower than SLOW_QUERY_MS.',
+                '# TYPE inventorix_slow_queries_total counter',
+                f'inventorix_slow_queries_total {self.slow_queries}'
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def timed(name):
+    """Time a block as a named Server-Timing span of the current request.
+
+    A no-op when instrumentation is off or outside a request.
+    """
+    if not has_request_context() or 'metrics_start' not in g:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.metrics_spans[name] = g.metrics_spans.get(name, 0.0) + time.perf_counter() - start
+
+
+def init_metrics(app):
+    """Install request timing, SQL counting and GET /metrics if METRICS_ENABLED is set."""
+    if not app.config.get('METRICS_ENABLED'):
+        return None
+    registry = Registry()
+    app.extensions['metrics'] = registry
+    slow_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+    server_timing = app.config.get('SERVER_TIMING', False)
+
+    # The start time lives on the statement's execution context, so a
+    # statement that raises (and never reaches after_cursor_execute)
+    # leaves nothing behind on the pooled connection.
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _query_start(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _query_end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        if elapsed >= slow_seconds:
+            registry.slow_query()
+            logger.warning('slow query (%.1f ms): %s', elapsed * 1000, statement)
+        if has_request_context() and 'metrics_start' in g:
+            g.metrics_queries += 1
+            g.metrics_db += elapsed
+
+    @app.before_request
+    def _start_request():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db = 0.0
+        g.metrics_spans = {}
+
+    @app.after_request
+    def _finish_request(response):
+        if 'metrics_start' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        # Streamed bodies (exports) are still being produced here, so their
+        # latency covers setup only.
+        registry.record(
+            request.method, request.url_rule.rule if request.url_rule else 'unmatched',
+            response.status_code, elapsed, g.metrics_queries, g.metrics_db
+        )
+        if server_timing:
+            parts = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in g.metrics_spans.items()]
+            parts.append(f'db;dur={g.metrics_db * 1000:.2f};desc="{g.metrics_queries} queries"')
+            parts.append(f'total;dur={elapsed * 1000:.2f}')
+            response.headers['Server-Timing'] = ', '.join(parts)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        lines = [line for fn in _collectors for line in fn()]
+        body = registry.render() + ''.join(line + '\n' for line in lines)
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
+    return registry
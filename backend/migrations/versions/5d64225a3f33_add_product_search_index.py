@@ -0,0 +1,86 @@
+"""Add product search index
+
+Revision ID: 5d64225a3f33
+Revises: 88c071530d76
+Create Date: 2026-10-18 10:31:02.118240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d64225a3f33'
+down_revision = '88c071530d76'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        tenant, name, category, warehouse, tokenize='unicode61', prefix='2 3'
+    )""",
+    """INSERT INTO products_fts(rowid, tenant, name, category, warehouse)
+    SELECT products.id, 't' || products.user_id, products.name, categories.name, warehouses.name
+    FROM products
+    LEFT OUTER JOIN categories ON categories.id = products.category_id
+    LEFT OUTER JOIN warehouses ON warehouses.id = products.warehouse_id""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, tenant, name, category, warehouse) VALUES (
+            new.id, 't' || new.user_id, new.name,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM warehouses WHERE id = new.warehouse_id)
+        );
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, category_id, warehouse_id, user_id ON products BEGIN
+        UPDATE products_fts SET
+            tenant = 't' || new.user_id,
+            name = new.name,
+            category = (SELECT name FROM categories WHERE id = new.category_id),
+            warehouse = (SELECT name FROM warehouses WHERE id = new.warehouse_id)
+        WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS categories_fts_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS warehouses_fts_au AFTER UPDATE OF name ON warehouses BEGIN
+        UPDATE products_fts SET warehouse = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE warehouse_id = new.id);
+    END"""
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS warehouses_fts_au",
+    "DROP TRIGGER IF EXISTS categories_fts_au",
+    "DROP TRIGGER IF EXISTS products_fts_ad",
+    "DROP TRIGGER IF EXISTS products_fts_au",
+    "DROP TRIGGER IF EXISTS products_fts_ai",
+    "DROP TABLE IF EXISTS products_fts"
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_products_name_trgm', 'products', ['name'], postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_categories_name_trgm', 'categories', ['name'], postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_warehouses_name_trgm', 'warehouses', ['name'], postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.drop_index('ix_warehouses_name_trgm', table_name='warehouses')
+        op.drop_index('ix_categories_name_trgm', table_name='categories')
+        op.drop_index('ix_products_name_trgm', table_name='products')
@@ -0,0 +1,101 @@
+"""Cascade deletes to tenant data
+
+Revision ID: ae4045f6698f
+Revises: 47eb07547532
+Create Date: 2026-10-18 10:51:37.711958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ae4045f6698f'
+down_revision = '47eb07547532'
+branch_labels = None
+depends_on = None
+
+
+# The foreign keys were created unnamed; on PostgreSQL they got the
+# default <table>_<column>_fkey names, which this convention reproduces
+# (and gives SQLite's reflected keys in batch mode).
+NAMING = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+FOREIGN_KEYS = [
+    ('categories', 'users', 'user_id'),
+    ('warehouses', 'users', 'user_id'),
+    ('products', 'categories', 'category_id'),
+    ('products', 'warehouses', 'warehouse_id'),
+    ('products', 'users', 'user_id'),
+    ('stock_movements', 'products', 'product_id'),
+    ('stock_movements', 'users', 'user_id'),
+]
+
+# Batch mode recreates these tables on SQLite. The search triggers from
+# 5d64225a3f33 reference them (renaming the copy into place fails while a
+# trigger points at a missing table), so they are dropped first and put
+# back unchanged afterwards.
+SQLITE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, tenant, name, category, warehouse) VALUES (
+            new.id, 't' || new.user_id, new.name,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM warehouses WHERE id = new.warehouse_id)
+        );
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, category_id, warehouse_id, user_id ON products BEGIN
+        UPDATE products_fts SET
+            tenant = 't' || new.user_id,
+            name = new.name,
+            category = (SELECT name FROM categories WHERE id = new.category_id),
+            warehouse = (SELECT name FROM warehouses WHERE id = new.warehouse_id)
+        WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS categories_fts_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS warehouses_fts_au AFTER UPDATE OF name ON warehouses BEGIN
+        UPDATE products_fts SET warehouse = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE warehouse_id = new.id);
+    END"""
+]
+
+
+def _set_ondelete(ondelete):
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    if sqlite:
+        for trigger in ('products_fts_ai', 'products_fts_au', 'products_fts_ad', 'categories_fts_au', 'warehouses_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    for table in ('categories', 'warehouses', 'products', 'stock_movements'):
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING) as batch_op:
+            for fk_table, referent, column in FOREIGN_KEYS:
+                if fk_table != table:
+                    continue
+                name = f'{table}_{column}_fkey'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+
+    if sqlite:
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    _set_ondelete('CASCADE')
+
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.create_index('ix_stock_movements_product_id', ['product_id'], unique=False)
+        batch_op.create_index('ix_stock_movements_target_product_id', ['target_product_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_movements_target_product_id')
+        batch_op.drop_index('ix_stock_movements_product_id')
+
+    _set_ondelete(None)
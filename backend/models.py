@@ -1,11 +1,44 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from sqlalchemy.orm import validates
-from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from datetime import datetime
+import math
 import os
+from passwords import hash_password, verify_password, needs_rehash
+from database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def check_price(price):
+    if not math.isfinite(price):
+        raise ValueError("Price must be a finite number")
+    if price <= 0:
+        raise ValueError("Price must be positive")
+    return price
+
+
+def check_name(name):
+    if not name:
+        raise ValueError("Product name cannot be empty")
+    return name
+
+
+def check_reorder_threshold(threshold):
+    if threshold is not None and (isinstance(threshold, bool) or not isinstance(threshold, int) or threshold < 0):
+        raise ValueError("Reorder threshold must be a non-negative integer or null")
+    return threshold
+
+
+def get_token_serializer():
+    """Return the app's token serializer, building it once from SECRET_KEY."""
+    serializer = current_app.extensions.get('token_serializer')
+    if serializer is None:
+        serializer = URLSafeTimedSerializer(current_app.config.get('SECRET_KEY') or os.getenv('SECRET_KEY', 'dev-secret-key'))
+        current_app.extensions['token_serializer'] = serializer
+    return serializer
 
 
 class User(db.Model):
@@ -17,11 +50,16 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     _password_hash = db.Column(db.String(128), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every write to the tenant's inventory; drives ETags
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    data_updated_at = db.Column(db.DateTime)
 
     # Relationships
-    products = db.relationship('Product', backref='user', cascade='all, delete-orphan')
-    categories = db.relationship('Category', backref='user', cascade='all, delete-orphan')
-    warehouses = db.relationship('Warehouse', backref='user', cascade='all, delete-orphan')
+    # passive_deletes: the database's ON DELETE CASCADE removes the children,
+    # instead of the ORM loading and deleting them one row at a time.
+    products = db.relationship('Product', backref='user', cascade='all, delete-orphan', passive_deletes=True)
+    categories = db.relationship('Category', backref='user', cascade='all, delete-orphan', passive_deletes=True)
+    warehouses = db.relationship('Warehouse', backref='user', cascade='all, delete-orphan', passive_deletes=True)
 
     @property
     def password(self):
@@ -29,26 +67,35 @@ class User(db.Model):
 
     @password.setter
     def password(self, password):
-        self._password_hash = generate_password_hash(password)
+        self._password_hash = hash_password(password)
 
     def authenticate(self, password):
-        return check_password_hash(self._password_hash, password)
+        """Check the password; on success, upgrade a hash made with outdated settings (caller commits)."""
+        if not verify_password(self._password_hash, password):
+            return False
+        if needs_rehash(self._password_hash):
+            self.password = password
+        return True
 
     def generate_token(self, expires_sec=3600):
         """Generate a timed JWT-like token."""
-        s = URLSafeTimedSerializer(os.getenv('SECRET_KEY', 'dev-secret-key'))
-        return s.dumps({'user_id': self.id})
+        return get_token_serializer().dumps({'user_id': self.id})
 
     @staticmethod
-    def verify_token(token, max_age=3600):
-        """Verify and decode token."""
-        s = URLSafeTimedSerializer(os.getenv('SECRET_KEY', 'dev-secret-key'))
+    def decode_token(token, max_age=3600):
+        """Check the token signature and age; return (user_id, signed_at) or None."""
         try:
-            data = s.loads(token, max_age=max_age)
-            return User.query.get(data['user_id'])
+            data, signed_at = get_token_serializer().loads(token, max_age=max_age, return_timestamp=True)
+            return data['user_id'], signed_at
         except (BadSignature, SignatureExpired):
             return None
 
+    @staticmethod
+    def verify_token(token, max_age=3600):
+        """Verify and decode token."""
+        decoded = User.decode_token(token, max_age)
+        return db.session.get(User, decoded[0]) if decoded else None
+
     @validates('username')
     def validate_username(self, key, username):
         if not username or len(username) < 3:
@@ -72,34 +119,52 @@ class User(db.Model):
 
 class Category(db.Model):
     __tablename__ = 'categories'
+    __table_args__ = (
+        db.Index('ix_categories_user_id_id', 'user_id', 'id'),
+        db.Index('ix_categories_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     in_stock = db.Column(db.Boolean, default=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Default reorder point for products in this category that don't set their own
+    reorder_threshold = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
 
     # Relationships
-    products = db.relationship('Product', backref='category', cascade='all, delete-orphan')
+    products = db.relationship('Product', backref='category', cascade='all, delete-orphan', passive_deletes=True)
+
+    @validates('reorder_threshold')
+    def validate_reorder_threshold(self, key, threshold):
+        return check_reorder_threshold(threshold)
 
     def to_dict(self):
         return {
             "id": self.id,
             "name": self.name,
             "in_stock": self.in_stock,
+            "reorder_threshold": self.reorder_threshold,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "user_id": self.user_id
         }
 
 class Warehouse(db.Model):
     __tablename__ = 'warehouses'
+    __table_args__ = (
+        db.Index('ix_warehouses_user_id_id', 'user_id', 'id'),
+        db.Index('ix_warehouses_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(200), nullable=False)
     supplier = db.Column(db.String(100))
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
 
     # One-to-many: warehouse → products
-    products = db.relationship('Product', backref='warehouse', cascade='all, delete-orphan')
+    products = db.relationship('Product', backref='warehouse', cascade='all, delete-orphan', passive_deletes=True)
 
     def to_dict(self):
         return {
@@ -107,34 +172,51 @@ class Warehouse(db.Model):
             "name": self.name,
             "location": self.location,
             "supplier": self.supplier,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "user_id": self.user_id
         }
 
 
 class Product(db.Model):
     __tablename__ = 'products'
+    # Every query is scoped to a tenant, so user_id leads each index.
+    __table_args__ = (
+        db.Index('ix_products_user_id_id', 'user_id', 'id'),
+        db.Index('ix_products_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_products_user_id_category_id', 'user_id', 'category_id'),
+        db.Index('ix_products_user_id_warehouse_id', 'user_id', 'warehouse_id'),
+        db.Index('ix_products_user_id_quantity', 'user_id', 'quantity'),
+        db.Index('ix_products_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     price = db.Column(db.Float, nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
+    reorder_threshold = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    warehouse_id = db.Column(db.Integer, db.ForeignKey('warehouses.id', ondelete='CASCADE'), nullable=False)  # ✅ one warehouse
 
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    warehouse_id = db.Column(db.Integer, db.ForeignKey('warehouses.id'), nullable=False)  # ✅ one warehouse
+    movements = db.relationship(
+        'StockMovement', foreign_keys='StockMovement.product_id', backref='product', cascade='all, delete-orphan',
+        passive_deletes=True
+    )
 
     @validates('price')
     def validate_price(self, key, price):
-        if price <= 0:
-            raise ValueError("Price must be positive")
-        return price
+        return check_price(price)
 
     @validates('name')
     def validate_name(self, key, name):
-        if not name:
-            raise ValueError("Product name cannot be empty")
-        return name
+        return check_name(name)
+
+    @validates('reorder_threshold')
+    def validate_reorder_threshold(self, key, threshold):
+        return check_reorder_threshold(threshold)
 
     def to_dict(self):
         return {
@@ -142,9 +224,180 @@ class Product(db.Model):
             "name": self.name,
             "price": self.price,
             "quantity": self.quantity,
+            "reorder_threshold": self.reorder_threshold,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "category_id": self.category_id,
             "warehouse_id": self.warehouse_id,
             "category": self.category.name if self.category else None,
             "warehouse": self.warehouse.name if self.warehouse else None
         }
+
+
+class StockMovement(db.Model):
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_user_id_product_id_id', 'user_id', 'product_id', 'id'),
+        # Lookups made by the ON DELETE actions when products are deleted
+        db.Index('ix_stock_movements_product_id', 'product_id'),
+        db.Index('ix_stock_movements_target_product_id', 'target_product_id'),
+    )
+
+    KINDS = ('receive', 'pick', 'adjust', 'transfer')
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    quantity_after = db.Column(db.Integer, nullable=False)
+    note = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
+    target_product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='SET NULL'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    @validates('kind')
+    def validate_kind(self, key, kind):
+        if kind not in self.KINDS:
+            raise ValueError(f"Movement kind must be one of: {', '.join(self.KINDS)}")
+        return kind
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "delta": self.delta,
+            "quantity_after": self.quantity_after,
+            "note": self.note,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "product_id": self.product_id,
+            "target_product_id": self.target_product_id
+        }
+
+
+class Tombstone(db.Model):
+    """Record of a deleted category, warehouse or product, kept for delta sync."""
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_user_id_deleted_at_id', 'user_id', 'deleted_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    def to_dict(self):
+        return {
+            "type": self.entity,
+            "id": self.entity_id,
+            "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None
+        }
+
+
+class StockAlert(db.Model):
+    """Open reorder alert: the product is at or below its effective reorder threshold.
+
+    Rows are added and removed as quantities and thresholds change (see
+    alerts.py); a product has at most one.
+    """
+    __tablename__ = 'stock_alerts'
+    __table_args__ = (
+        db.Index('ix_stock_alerts_user_id_id', 'user_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False, unique=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+
+class StockSnapshot(db.Model):
+    """A product's quantity and stock value for one day, or at the close of a week or month.
+
+    `flask snapshots take` adds a 'day' row per product; `flask snapshots
+    downsample` folds old days into 'week' rows and old weeks into 'month'
+    rows, keyed by the bucket's first day.
+    """
+    __tablename__ = 'stock_snapshots'
+    __table_args__ = (
+        db.Index('ix_stock_snapshots_user_id_period_day', 'user_id', 'period', 'day'),
+    )
+
+    PERIODS = ('day', 'week', 'month')
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    period = db.Column(db.String(5), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    value = db.Column(db.Float, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    def to_dict(self):
+        return {
+            "period": self.period,
+            "day": self.day.isoformat(),
+            "quantity": self.quantity,
+            "value": self.value
+        }
+
+
+class Job(db.Model):
+    """Background job for a tenant, queued in the database and run by `flask jobs work` (see jobs.py)."""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at_id', 'status', 'run_at', 'id'),
+        db.Index('ix_jobs_user_id_id', 'user_id', 'id'),
+    )
+
+    STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    progress_done = db.Column(db.Integer)
+    progress_total = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    # Earliest time a worker may pick the job up; pushed back between retries
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "progress": {"done": self.progress_done, "total": self.progress_total},
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+def _record_tombstone(entity):
+    def listener(mapper, connection, target):
+        connection.execute(Tombstone.__table__.insert().values(
+            entity=entity, entity_id=target.id, user_id=target.user_id, deleted_at=datetime.utcnow()
+        ))
+    return listener
+
+
+for _model, _entity in ((Category, 'category'), (Warehouse, 'warehouse'), (Product, 'product')):
+    event.listen(_model, 'after_delete', _record_tombstone(_entity))
@@ -0,0 +1,113 @@
+from sqlalchemy import select, update
+from models import db, Product, StockMovement
+from alerts import refresh_alerts
+
+
+class MovementError(ValueError):
+    """A movement that cannot be applied; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_movement(data, product_id=None):
+    """Validate one movement payload and return (kind, product_id, target_id, delta, note)."""
+    if not isinstance(data, dict):
+        raise MovementError("Each movement must be an object")
+    kind = data.get('kind')
+    if kind not in StockMovement.KINDS:
+        raise MovementError(f"Movement kind must be one of: {', '.join(StockMovement.KINDS)}")
+
+    product_id = product_id if product_id is not None else data.get('product_id')
+    if not isinstance(product_id, int):
+        raise MovementError("product_id is required")
+
+    quantity = data.get('quantity')
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        raise MovementError("quantity must be an integer")
+
+    target_id = None
+    if kind == 'adjust':
+        if quantity == 0:
+            raise MovementError("An adjustment must change the quantity")
+        delta = quantity
+    else:
+        if quantity <= 0:
+            raise MovementError("quantity must be positive")
+        delta = -quantity if kind in ('pick', 'transfer') else quantity
+
+    if kind == 'transfer':
+        target_id = data.get('target_product_id')
+        if not isinstance(target_id, int) or target_id == product_id:
+            raise MovementError("A transfer needs a target_product_id other than the source product")
+
+    return kind, product_id, target_id, delta, data.get('note')
+
+
+def apply_delta(user_id, product_id, delta):
+    """Atomically add `delta` to a product's quantity, refusing to go below zero.
+
+    The arithmetic happens in the UPDATE itself, so concurrent writers
+    never read-modify-write and the row lock is held only for the statement.
+    Returns the new quantity.
+    """
+    stmt = (
+        update(Product)
+        .where(Product.id == product_id, Product.user_id == user_id, Product.quantity + delta >= 0)
+        .values(quantity=Product.quantity + delta)
+        .returning(Product.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    new_quantity = db.session.execute(stmt).scalar()
+    if new_quantity is not None:
+        return new_quantity
+
+    exists = db.session.query(Product.id).filter_by(id=product_id, user_id=user_id).first()
+    if not exists:
+        raise MovementError(f"Product {product_id} not found", 404)
+    raise MovementError(f"Insufficient stock for product {product_id}", 409)
+
+
+def lock_products(user_id, product_ids):
+    """Lock the given products' rows in id order, as one SELECT ... FOR UPDATE.
+
+    Taking every lock a batch needs up front, in a fixed order, keeps two
+    batches touching the same rows (a transfer A->B against B->A, say)
+    from each holding a lock the other waits on. SQLite has no row locks
+    and ignores FOR UPDATE; its writers are serialized anyway.
+    """
+    db.session.execute(
+        select(Product.id)
+        .where(Product.user_id == user_id, Product.id.in_(sorted(product_ids)))
+        .order_by(Product.id)
+        .with_for_update()
+    ).all()
+
+
+def apply_movements(user_id, movements):
+    """Apply parsed movements in one transaction and return the recorded StockMovements.
+
+    The rows of every source and target product are locked first, in id
+    order (see lock_products), then movements are applied in the order
+    received, so a later movement can use stock an earlier one moved.
+    The caller commits or rolls back.
+    """
+    lock_products(user_id, {m[1] for m in movements} | {m[2] for m in movements if m[2] is not None})
+    recorded = []
+    for kind, product_id, target_id, delta, note in movements:
+        quantity_after = apply_delta(user_id, product_id, delta)
+        recorded.append(StockMovement(
+            kind=kind, delta=delta, quantity_after=quantity_after, note=note,
+            product_id=product_id, target_product_id=target_id, user_id=user_id
+        ))
+        if kind == 'transfer':
+            target_after = apply_delta(user_id, target_id, -delta)
+            recorded.append(StockMovement(
+                kind=kind, delta=-delta, quantity_after=target_after, note=note,
+                product_id=target_id, target_product_id=product_id, user_id=user_id
+            ))
+    db.session.add_all(recorded)
+    db.session.flush()
+    refresh_alerts({movement.product_id for movement in recorded})
+    return recorded
@@ -0,0 +1,133 @@
+import base64
+import json
+import math
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort, value, id):
+    """Encode the last row of a page as an opaque cursor."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "v": value, "id": id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _cursor_value(value, column):
+    """The cursor's sort value as `column`'s Python type; raises ValueError if it can't be one."""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError
+        return datetime.fromisoformat(value)
+    if isinstance(value, bool):
+        raise ValueError
+    if python_type is float:
+        if not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError
+        return float(value)
+    if isinstance(value, python_type):
+        return value
+    raise ValueError
+
+
+def decode_cursor(cursor, column=None):
+    """Return (sort, value, id) from a cursor, raising ValueError("Invalid cursor") for anything malformed.
+
+    With `column`, the value must also fit the sort column's type, so a
+    tampered cursor is a 400 rather than a failed query.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = _cursor_value(data['v'], column) if column is not None else data['v']
+        return data['s'], value, int(data['id'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_limit(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_sort(args, sortable, default='id'):
+    """Return (sort name, column, descending) for the `sort` query param."""
+    sort = args.get('sort', default)
+    name = sort.lstrip('-')
+    if name not in sortable:
+        raise ValueError(f"Cannot sort by '{name}'. Allowed: {', '.join(sorted(sortable))}")
+    return sort, sortable[name], sort.startswith('-')
+
+
+def _after(column, value, id_column, last_id, descending, nullable):
+    """Rows that come after (value, last_id) in the page order.
+
+    NULLs sort as if larger than any value, last ascending and first
+    descending, which matches a plain index on PostgreSQL.
+    """
+    after_id = id_column < last_id if descending else id_column > last_id
+    if value is None:
+        if not nullable:
+            raise ValueError("Invalid cursor")
+        tail = and_(column.is_(None), after_id)
+        # Descending, the NULLs came first, so every non-NULL row is still ahead
+        return or_(tail, column.is_not(None)) if descending else tail
+    after = or_(column < value if descending else column > value, and_(column == value, after_id))
+    return or_(after, column.is_(None)) if nullable and not descending else after
+
+
+def keyset_page(query, id_column, sortable, default_sort='id', args=None):
+    """Apply keyset pagination to `query` using the request args.
+
+    Rows are ordered by the requested sort column with `id_column` as a
+    tie-breaker, so the cursor only needs the last row's (value, id) and
+    each page is an index range scan instead of an OFFSET. Nullable
+    sort columns keep NULL rows together at one end (see _after).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    args = request.args if args is None else args
+    limit = parse_limit(args)
+    sort, column, descending = parse_sort(args, sortable, default_sort)
+
+    nullable = column is not id_column and getattr(column.expression, 'nullable', False)
+
+    cursor = args.get('cursor')
+    if cursor:
+        cursor_sort, value, last_id = decode_cursor(cursor, column)
+        if cursor_sort != sort:
+            raise ValueError("Cursor does not match the requested sort")
+        if column is id_column:
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            query = query.filter(_after(column, value, id_column, last_id, descending, nullable))
+
+    if column is id_column:
+        order = [id_column.desc() if descending else id_column.asc()]
+    elif descending:
+        order = [column.desc().nulls_first() if nullable else column.desc(), id_column.desc()]
+    else:
+        order = [column.asc().nulls_last() if nullable else column.asc(), id_column.asc()]
+
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, column.key), getattr(last, id_column.key))
+    return rows, next_cursor
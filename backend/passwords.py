@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, has_app_context, has_request_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'scrypt'
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many hash jobs are already waiting; callers answer 503."""
+
+
+class PasswordPool:
+    """Bounded process pool for password hashing and verification.
+
+    At most `workers` hashes run at once, in separate processes, so a
+    login burst uses a fixed slice of CPU instead of every request
+    thread. Up to `queue` more jobs wait; beyond that, submit raises
+    PasswordPoolBusy rather than queueing without limit. With workers=0
+    the work runs inline.
+    """
+
+    def __init__(self, workers, queue):
+        self.pid = os.getpid()
+        self.workers = workers
+        # spawn, not fork: the pool starts lazily inside threaded workers,
+        # and forking a process with live threads can copy held locks.
+        self.executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) if workers else None
+        self.slots = threading.BoundedSemaphore(workers + queue) if workers else None
+
+    def run(self, fn, *args):
+        if self.executor is None:
+            return fn(*args)
+        if not self.slots.acquire(blocking=False):
+            raise PasswordPoolBusy("Too many password checks in progress, try again shortly")
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+
+_lock = threading.Lock()
+_inline = PasswordPool(0, 0)
+
+
+def get_pool():
+    """Return this process's pool, creating it after fork (e.g. in each gunicorn worker).
+
+    Only requests use the pool; scripts such as seed.py hash inline, since
+    spawned pool processes re-import the main module.
+    """
+    if not has_request_context():
+        return _inline
+    pool = current_app.extensions.get('password_pool')
+    if pool is None or pool.pid != os.getpid():
+        with _lock:
+            pool = current_app.extensions.get('password_pool')
+            if pool is None or pool.pid != os.getpid():
+                pool = PasswordPool(
+                    current_app.config.get('PASSWORD_HASH_WORKERS', 0),
+                    current_app.config.get('PASSWORD_HASH_QUEUE', 0)
+                )
+                current_app.extensions['password_pool'] = pool
+    return pool
+
+
+def hash_method():
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    return DEFAULT_METHOD
+
+
+def hash_password(password):
+    return get_pool().run(generate_password_hash, password, hash_method())
+
+
+def verify_password(pwhash, password):
+    return get_pool().run(check_password_hash, pwhash, password)
+
+
+_prefixes = {}
+
+
+def needs_rehash(pwhash):
+    """True if `pwhash` was made with different parameters than PASSWORD_HASH_METHOD.
+
+    Werkzeug fills in defaults (e.g. "scrypt" becomes "scrypt:32768:8:1"),
+    so the expected prefix is taken from a sample hash, once per method.
+    """
+    method = hash_method()
+    prefix = _prefixes.get(method)
+    if prefix is None:
+        prefix = _prefixes[method] = hash_password('').split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != prefix
@@ -0,0 +1,198 @@
+import json
+from functools import wraps
+from threading import Lock
+from flask import Response, current_app, g, request
+from sqlalchemy import event
+from cache import TTLCache
+from metrics import collector
+from models import db, Category, Warehouse
+from versions import current_version
+
+try:
+    import redis
+except ImportError:  # redis is optional; without it every worker caches locally
+    redis = None
+
+
+class LocalBackend:
+    """In-process LRU of per-tenant dicts; each gunicorn worker has its own."""
+    max_fields = 100
+
+    def __init__(self, maxsize, ttl):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id, field):
+        return self.cache.get(user_id, {}).get(field)
+
+    def set(self, user_id, field, value):
+        entries = self.cache.get(user_id)
+        if entries is None:
+            entries = {}
+            self.cache.set(user_id, entries)
+        elif len(entries) >= self.max_fields:
+            entries.clear()
+        entries[field] = value
+
+    def delete(self, user_id):
+        self.cache.delete(user_id)
+
+
+class RedisBackend:
+    """One Redis hash per tenant, shared by every worker; values are JSON."""
+
+    def __init__(self, url, ttl):
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _key(self, user_id):
+        return f'inventorix:reference:{user_id}'
+
+    def get(self, user_id, field):
+        value = self.client.hget(self._key(user_id), field)
+        return json.loads(value) if value is not None else None
+
+    def set(self, user_id, field, value):
+        key = self._key(user_id)
+        pipe = self.client.pipeline()
+        pipe.hset(key, field, json.dumps(value))
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, user_id):
+        self.client.delete(self._key(user_id))
+
+
+class ReferenceCache:
+    """Read-through cache for a tenant's categories and warehouses.
+
+    Entries are stored as [version, value] and only returned while the
+    tenant's data_version still matches, so a write handled by another
+    worker can never be served stale from a local cache. Category and
+    warehouse writes also drop the tenant's entries outright.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = {}
+        self.misses = {}
+        self._lock = Lock()
+
+    def _count(self, counter, kind):
+        with self._lock:
+            counter[kind] = counter.get(kind, 0) + 1
+
+    def get_or_load(self, kind, user_id, field, version, load):
+        entry = self.backend.get(user_id, field)
+        if entry is not None and entry[0] == version:
+            self._count(self.hits, kind)
+            return entry[1]
+        self._count(self.misses, kind)
+        value = load()
+        if value is not None:
+            self.backend.set(user_id, field, [version, value])
+        return value
+
+    def invalidate(self, user_id):
+        self.backend.delete(user_id)
+
+
+def get_reference_cache():
+    cache = current_app.extensions.get('reference_cache')
+    if cache is None:
+        url = current_app.config.get('REFERENCE_CACHE_URL')
+        ttl = current_app.config.get('REFERENCE_CACHE_TTL', 300)
+        if url and redis is not None:
+            backend = RedisBackend(url, ttl)
+        else:
+            if url:
+                current_app.logger.warning('REFERENCE_CACHE_URL is set but redis is not installed; caching locally')
+            backend = LocalBackend(current_app.config.get('REFERENCE_CACHE_SIZE', 10000), ttl)
+        cache = ReferenceCache(backend)
+        current_app.extensions['reference_cache'] = cache
+    return cache
+
+
+@collector
+def reference_cache_metrics():
+    cache = current_app.extensions.get('reference_cache')
+    if cache is None:
+        return []
+    lines = [
+        '# HELP inventorix_reference_cache_requests_total Reference cache lookups by kind and result.',
+        '# TYPE inventorix_reference_cache_requests_total counter'
+    ]
+    for result, counter in (('hit', cache.hits), ('miss', cache.misses)):
+        for kind, count in sorted(counter.items()):
+            lines.append(f'inventorix_reference_cache_requests_total{{kind="{kind}",result="{result}"}} {count}')
+    return lines
+
+
+def tenant_version(user_id):
+    """The tenant's data_version, reusing the one `conditional` already read for this request."""
+    if 'tenant_version' not in g:
+        g.tenant_version = current_version(user_id)[0]
+    return g.tenant_version
+
+
+def name_maps(user_id):
+    """{"category": {id: name}, "warehouse": {id: name}} for a tenant, cached."""
+    def load():
+        return {
+            "category": db.session.query(Category.id, Category.name).filter(Category.user_id == user_id).all(),
+            "warehouse": db.session.query(Warehouse.id, Warehouse.name).filter(Warehouse.user_id == user_id).all()
+        }
+    # Stored as [id, name] pairs, since JSON backends turn integer keys into strings.
+    pairs = get_reference_cache().get_or_load('names', user_id, 'names', tenant_version(user_id), lambda: {
+        kind: [list(row) for row in rows] for kind, rows in load().items()
+    })
+    return {kind: dict(rows) for kind, rows in pairs.items()}
+
+
+def cached_response(f):
+    """Serve a reference-data GET from the cache, keyed by its full path.
+
+    Goes under `conditional`, which has already read the tenant's version.
+    Only 200 responses are stored, as the encoded JSON body.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if request.method != 'GET':
+            return f(current_user, *args, **kwargs)
+        stored = {}
+
+        def load():
+            response = current_app.make_response(f(current_user, *args, **kwargs))
+            stored['response'] = response
+            return response.get_data(as_text=True) if response.status_code == 200 else None
+
+        body = get_reference_cache().get_or_load(
+            'response', current_user.id, request.full_path, tenant_version(current_user.id), load
+        )
+        if 'response' in stored:
+            return stored['response']
+        return Response(body, mimetype=current_app.json.mimetype)
+
+    return decorated
+
+
+def _mark_reference_change(mapper, connection, target):
+    db.session.info.setdefault('reference_tenants', set()).add(target.user_id)
+
+
+for _model in (Category, Warehouse):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_reference_change)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_reference(session):
+    tenants = session.info.pop('reference_tenants', ())
+    if tenants:
+        cache = get_reference_cache()
+        for user_id in tenants:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_reference_changes(session):
+    session.info.pop('reference_tenants', None)
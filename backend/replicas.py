@@ -0,0 +1,66 @@
+import random
+from threading import Lock
+from flask import current_app, g, request
+from sqlalchemy import event
+from metrics import collector
+from models import db
+from versions import written_within
+
+READ_METHODS = ('GET', 'HEAD')
+# GETs that always read from the primary. A sync cursor only looks back
+# sync.SAFETY_WINDOW, so rows a lagging replica hadn't received yet would
+# be skipped for good.
+PRIMARY_ENDPOINTS = {'sync'}
+
+_queries = {}
+_lock = Lock()
+
+
+def init_replicas(app):
+    """Pick up the replica binds (see database.replica_binds) and count statements per engine.
+
+    The counts are exposed on GET /metrics as inventorix_db_engine_queries_total,
+    to check which engine requests actually used.
+    """
+    with app.app_context():
+        engines = {key or 'primary': engine for key, engine in db.engines.items()}
+    app.extensions['read_replicas'] = [
+        engine for key, engine in engines.items() if key in app.config.get('SQLALCHEMY_BINDS', {})
+    ]
+    for name, engine in engines.items():
+        _count_queries(name, engine)
+
+
+def _count_queries(name, engine):
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _counted(conn, cursor, statement, parameters, context, executemany):
+        with _lock:
+            _queries[name] = _queries.get(name, 0) + 1
+
+
+def route_reads(user_id):
+    """Send the rest of this GET's reads to a replica, unless the tenant is in its read-your-writes window.
+
+    Called by token_required once the tenant is known. The window check
+    reads the tenant's data_updated_at from the primary, so it holds
+    whichever worker took the write.
+    """
+    replicas = current_app.extensions.get('read_replicas')
+    if not replicas or request.method not in READ_METHODS or request.endpoint in PRIMARY_ENDPOINTS:
+        return
+    window = current_app.config.get('READ_YOUR_WRITES_SECONDS', 5)
+    if window > 0 and written_within(user_id, window):
+        return
+    g.read_engine = random.choice(replicas)
+
+
+@collector
+def engine_query_metrics():
+    lines = [
+        '# HELP inventorix_db_engine_queries_total SQL statements executed per engine (primary, replicaN).',
+        '# TYPE inventorix_db_engine_queries_total counter'
+    ]
+    with _lock:
+        for name, count in sorted(_queries.items()):
+            lines.append(f'inventorix_db_engine_queries_total{{engine="{name}"}} {count}')
+    return lines
@@ -0,0 +1,141 @@
+import re
+from sqlalchemy import DDL, case, event, func, or_, text
+from models import db, Product, Category, Warehouse
+from pagination import decode_cursor, encode_cursor, parse_limit
+
+MAX_RESULTS = 1000
+
+# SQLite keeps an FTS5 index of product, category and warehouse names.
+# Triggers keep it in sync with every write path, including the bulk
+# import and bulk PATCH/DELETE statements that bypass the ORM.
+# The tenant is an indexed column ("t<user_id>") so the MATCH itself is
+# tenant-scoped instead of filtering other tenants' hits afterwards.
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        tenant, name, category, warehouse, tokenize='unicode61', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, tenant, name, category, warehouse) VALUES (
+            new.id, 't' || new.user_id, new.name,
+            (SELECT name FROM categories WHERE id = new.category_id),
+            (SELECT name FROM warehouses WHERE id = new.warehouse_id)
+        );
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, category_id, warehouse_id, user_id ON products BEGIN
+        UPDATE products_fts SET
+            tenant = 't' || new.user_id,
+            name = new.name,
+            category = (SELECT name FROM categories WHERE id = new.category_id),
+            warehouse = (SELECT name FROM warehouses WHERE id = new.warehouse_id)
+        WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS categories_fts_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS warehouses_fts_au AFTER UPDATE OF name ON warehouses BEGIN
+        UPDATE products_fts SET warehouse = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE warehouse_id = new.id);
+    END"""
+]
+
+# Postgres uses pg_trgm GIN indexes, which need no extra sync.
+POSTGRES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_categories_name_trgm ON categories USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_warehouses_name_trgm ON warehouses USING gin (name gin_trgm_ops)"
+]
+
+# db.create_all() (used by seed.py) should produce a searchable schema too.
+for statement in SQLITE_FTS_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_TRGM_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
+def search_terms(q):
+    return re.findall(r'\w+', q.lower())
+
+
+def _sqlite_ranked_ids(user_id, terms, offset, limit):
+    match = f'tenant:t{user_id} AND {{name category warehouse}}: (' + ' '.join(f'"{t}"*' for t in terms) + ')'
+    rows = db.session.execute(
+        text(
+            "SELECT rowid FROM products_fts WHERE products_fts MATCH :match "
+            "ORDER BY bm25(products_fts, 0.0, 10.0, 2.0, 1.0), rowid LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "limit": limit, "offset": offset}
+    )
+    return [row[0] for row in rows]
+
+
+def _postgres_ranked_ids(user_id, q, offset, limit):
+    escaped = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    prefix = Product.name.ilike(f'{escaped}%')
+    rows = (
+        db.session.query(Product.id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(Warehouse, Warehouse.id == Product.warehouse_id)
+        .filter(Product.user_id == user_id)
+        .filter(or_(
+            prefix,
+            Product.name.op('%>')(q),
+            Category.name.op('%>')(q),
+            Warehouse.name.op('%>')(q)
+        ))
+        .order_by(
+            case((prefix, 0), else_=1),
+            func.word_similarity(q, Product.name).desc(),
+            Product.id
+        )
+        .offset(offset)
+        .limit(limit)
+    )
+    return [id for (id,) in rows]
+
+
+def search_products(user_id, q, args, query):
+    """Return (ranked rows of `query`, next_cursor) for a search query.
+
+    Ranked results are paged by position (capped at MAX_RESULTS), since a
+    relevance score makes a poor keyset. `query` selects the columns to
+    return and must include Product.id.
+    """
+    terms = search_terms(q or '')
+    if not terms:
+        raise ValueError("q must contain at least one letter or digit")
+    limit = parse_limit(args)
+    offset = 0
+    if args.get('cursor'):
+        sort, offset, _ = decode_cursor(args['cursor'])
+        if sort != 'search' or not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid cursor")
+    limit = max(min(limit, MAX_RESULTS - offset), 0)
+    if not limit:
+        return [], None
+
+    if db.engine.dialect.name == 'sqlite':
+        ids = _sqlite_ranked_ids(user_id, terms, offset, limit + 1)
+    else:
+        ids = _postgres_ranked_ids(user_id, ' '.join(terms), offset, limit + 1)
+
+    next_cursor = None
+    if len(ids) > limit:
+        ids = ids[:limit]
+        next_cursor = encode_cursor('search', offset + limit, ids[-1])
+
+    rows = query.filter(Product.user_id == user_id, Product.id.in_(ids)).all() if ids else []
+    position = {id: i for i, id in enumerate(ids)}
+    rows.sort(key=lambda row: position[row.id])
+    return rows, next_cursor
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep Alembic autogenerate from dropping the search objects it doesn't model."""
+    if reflected and compare_to is None and name and (name.startswith('products_fts') or name.endswith('_trgm')):
+        return False
+    return True
@@ -0,0 +1,130 @@
+from datetime import date, datetime, timedelta
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Date, and_, case, cast, delete, func, insert, literal, or_, select
+from models import db, Product, StockSnapshot
+from pagination import decode_cursor, encode_cursor, parse_limit
+
+COLUMNS = ['product_id', 'period', 'day', 'quantity', 'value', 'user_id']
+
+
+def take_snapshot(day):
+    """Record every product's quantity and value for `day` with one INSERT ... SELECT.
+
+    Taking the same day again replaces its rows, so the command can be
+    re-run safely.
+    """
+    db.session.execute(
+        delete(StockSnapshot).where(StockSnapshot.period == 'day', StockSnapshot.day == day)
+        .execution_options(synchronize_session=False)
+    )
+    count = db.session.execute(insert(StockSnapshot).from_select(COLUMNS, select(
+        Product.id, literal('day'), literal(day, Date), Product.quantity,
+        Product.price * Product.quantity, Product.user_id
+    ))).rowcount
+    db.session.commit()
+    return count
+
+
+def _bucket(column, period):
+    """First day of the week (Monday) or month containing `column`."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return cast(func.date_trunc(period, column), Date)
+    if period == 'week':
+        return func.date(column, '-6 days', 'weekday 1')
+    return func.date(column, 'start of month')
+
+
+def _fold(source, target, cutoff):
+    """Replace `source` rows before `cutoff` with one `target` row per bucket, holding the bucket's closing values."""
+    bucket = _bucket(StockSnapshot.day, target)
+    closing = (
+        select(StockSnapshot.product_id, bucket.label('bucket'), func.max(StockSnapshot.day).label('last'))
+        .where(StockSnapshot.period == source, StockSnapshot.day < cutoff)
+        .group_by(StockSnapshot.product_id, bucket)
+        .subquery()
+    )
+    count = db.session.execute(insert(StockSnapshot).from_select(COLUMNS, select(
+        StockSnapshot.product_id, literal(target), closing.c.bucket,
+        StockSnapshot.quantity, StockSnapshot.value, StockSnapshot.user_id
+    ).join(closing, and_(
+        StockSnapshot.product_id == closing.c.product_id,
+        StockSnapshot.period == source,
+        StockSnapshot.day == closing.c.last
+    )))).rowcount
+    db.session.execute(
+        delete(StockSnapshot).where(StockSnapshot.period == source, StockSnapshot.day < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    return count
+
+
+def downsample(today, daily_days, weekly_days):
+    """Fold days older than daily_days into weeks, and weeks older than weekly_days into months.
+
+    Cutoffs are moved back to a week or month boundary so a bucket is
+    only ever built from complete data. Returns (weeks, months) written.
+    """
+    day_cutoff = today - timedelta(days=daily_days)
+    day_cutoff -= timedelta(days=day_cutoff.weekday())
+    week_cutoff = (today - timedelta(days=weekly_days)).replace(day=1)
+    weeks = _fold('day', 'week', day_cutoff)
+    months = _fold('week', 'month', week_cutoff)
+    db.session.commit()
+    return weeks, months
+
+
+def init_snapshots(app):
+    """Register `flask snapshots take` and `flask snapshots downsample` on the app."""
+    snapshots_cli = AppGroup('snapshots', help='Daily stock snapshots.')
+    day_option = click.option('--day', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                              help='Date to use (default today, UTC).')
+
+    @snapshots_cli.command('take')
+    @day_option
+    def take_command(day):
+        """Snapshot every product's stock for the day."""
+        day = day.date() if day else datetime.utcnow().date()
+        click.echo(f'{take_snapshot(day)} products snapshotted for {day}')
+
+    @snapshots_cli.command('downsample')
+    @day_option
+    def downsample_command(day):
+        """Fold old daily snapshots into weekly and monthly ones."""
+        today = day.date() if day else datetime.utcnow().date()
+        weeks, months = downsample(
+            today, app.config['SNAPSHOT_DAILY_DAYS'], app.config['SNAPSHOT_WEEKLY_DAYS']
+        )
+        click.echo(f'{weeks} weekly and {months} monthly snapshots written')
+
+    app.cli.add_command(snapshots_cli)
+
+
+def product_history(user_id, product_id, args):
+    """A page of a product's snapshots, oldest first, and the cursor for the next one.
+
+    Rows sharing a day are ordered by period as in StockSnapshot.PERIODS,
+    so the cursor carries the last row's day and that period's position.
+    """
+    limit = parse_limit(args)
+    rank = case({period: i for i, period in enumerate(StockSnapshot.PERIODS)}, value=StockSnapshot.period)
+    query = StockSnapshot.query.filter_by(user_id=user_id, product_id=product_id)
+
+    cursor = args.get('cursor')
+    if cursor:
+        sort, day, last_rank = decode_cursor(cursor)
+        try:
+            day = date.fromisoformat(day)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if sort != 'day':
+            raise ValueError("Invalid cursor")
+        query = query.filter(or_(StockSnapshot.day > day, and_(StockSnapshot.day == day, rank > last_rank)))
+
+    rows = query.order_by(StockSnapshot.day, rank).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor('day', last.day.isoformat(), StockSnapshot.PERIODS.index(last.period))
+    return rows, next_cursor
@@ -0,0 +1,121 @@
+from flask import current_app
+from sqlalchemy import case, func
+from cache import TTLCache
+from models import db, Product, Category, Warehouse
+from reference import tenant_version
+from versions import on_tenant_change
+
+# (threshold, top) pairs cached per tenant
+SUMMARY_VARIANTS = 8
+
+
+def get_summary_cache():
+    cache = current_app.extensions.get('stats_cache')
+    if cache is None:
+        cache = TTLCache(ttl=current_app.config.get('STATS_CACHE_TTL', 30))
+        current_app.extensions['stats_cache'] = cache
+    return cache
+
+
+@on_tenant_change
+def invalidate_summary(user_id):
+    """Drop a tenant's cached summaries once a write to its inventory commits."""
+    get_summary_cache().delete(user_id)
+
+
+def _value(amount):
+    return round(amount or 0, 2)
+
+
+def compute_summary(user_id, threshold, top):
+    """Build the inventory summary from two SQL queries.
+
+    The first query groups by (category, warehouse) and carries every sum
+    we need, so totals and both breakdowns are rolled up from a handful of
+    grouped rows rather than from products. The second fetches the top-N
+    products by stock value.
+    """
+    value = Product.price * Product.quantity
+    groups = (
+        db.session.query(
+            Product.category_id, Category.name,
+            Product.warehouse_id, Warehouse.name,
+            func.count(Product.id),
+            func.coalesce(func.sum(Product.quantity), 0),
+            func.coalesce(func.sum(value), 0),
+            func.sum(case((Product.quantity <= 0, 1), else_=0)),
+            func.sum(case(((Product.quantity > 0) & (Product.quantity <= threshold), 1), else_=0))
+        )
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(Warehouse, Warehouse.id == Product.warehouse_id)
+        .filter(Product.user_id == user_id)
+        .group_by(Product.category_id, Category.name, Product.warehouse_id, Warehouse.name)
+        .all()
+    )
+
+    totals = {"total_products": 0, "total_quantity": 0, "total_value": 0.0, "out_of_stock": 0, "low_stock": 0}
+    by_category, by_warehouse = {}, {}
+    for category_id, category, warehouse_id, warehouse, count, quantity, stock_value, out, low in groups:
+        totals["total_products"] += count
+        totals["total_quantity"] += quantity
+        totals["total_value"] += stock_value
+        totals["out_of_stock"] += out
+        totals["low_stock"] += low
+        for bucket, key, label, name in (
+            (by_category, category_id, "category", category),
+            (by_warehouse, warehouse_id, "warehouse", warehouse)
+        ):
+            entry = bucket.setdefault(key, {
+                f"{label}_id": key, label: name, "products": 0, "quantity": 0, "value": 0.0
+            })
+            entry["products"] += count
+            entry["quantity"] += quantity
+            entry["value"] += stock_value
+
+    top_products = (
+        db.session.query(Product.id, Product.name, Product.price, Product.quantity, value.label('value'))
+        .filter(Product.user_id == user_id)
+        .order_by(value.desc(), Product.id)
+        .limit(top)
+        .all()
+    )
+
+    for bucket in (by_category, by_warehouse):
+        for entry in bucket.values():
+            entry["value"] = _value(entry["value"])
+
+    totals["total_value"] = _value(totals["total_value"])
+    return {
+        **totals,
+        "low_stock_threshold": threshold,
+        "by_category": sorted(by_category.values(), key=lambda e: e["value"], reverse=True),
+        "by_warehouse": sorted(by_warehouse.values(), key=lambda e: e["value"], reverse=True),
+        "top_products": [
+            {"id": id, "name": name, "price": price, "quantity": quantity, "value": _value(v)}
+            for id, name, price, quantity, v in top_products
+        ]
+    }
+
+
+def get_summary(user_id, threshold, top):
+    """Return the cached summary for a tenant, computing it on a miss.
+
+    Entries are stored with the tenant's data_version and only reused while
+    it still matches, as in reference.py, so a write handled by another
+    worker or by the jobs process is never answered with an old summary
+    under a new ETag. A tenant keeps at most SUMMARY_VARIANTS (threshold,
+    top) pairs, least recently used dropped first.
+    """
+    version = tenant_version(user_id)
+    cache = get_summary_cache()
+    entry = cache.get(user_id)
+    if entry is None or entry[0] != version:
+        entry = (version, TTLCache(maxsize=SUMMARY_VARIANTS, ttl=cache.ttl))
+        cache.set(user_id, entry)
+    summaries = entry[1]
+    key = (threshold, top)
+    summary = summaries.get(key)
+    if summary is None:
+        summary = compute_summary(user_id, threshold, top)
+        summaries.set(key, summary)
+    return summary
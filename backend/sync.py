@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, literal, or_, select, union_all
+from sqlalchemy.orm import joinedload
+from models import db, Product, Category, Warehouse, Tombstone
+from pagination import decode_cursor, encode_cursor, parse_limit
+
+# Rows written in the last few seconds may belong to transactions that
+# commit after a later timestamp was already read, so the final cursor of
+# a sync never moves past now - SAFETY_WINDOW. Those rows are re-sent on
+# the next sync, which clients apply idempotently.
+SAFETY_WINDOW = timedelta(seconds=5)
+
+# Sources are merged in (timestamp, kind, id) order; kind breaks ties
+# between rows of different tables written in the same instant.
+SOURCES = {
+    'category': (Category, Category.updated_at),
+    'deleted': (Tombstone, Tombstone.deleted_at),
+    'product': (Product, Product.updated_at),
+    'warehouse': (Warehouse, Warehouse.updated_at)
+}
+
+
+def _after(column, id_column, kind, cursor):
+    """Rows of one source that sort after the cursor position."""
+    ts, cursor_kind, last_id = cursor
+    if kind > cursor_kind:
+        return column >= ts
+    if kind < cursor_kind:
+        return column > ts
+    return or_(column > ts, and_(column == ts, id_column > last_id))
+
+
+def _parse_since(since):
+    if not since:
+        return None
+    sort, value, last_id = decode_cursor(since)
+    if sort not in SOURCES and sort != '':
+        raise ValueError("Invalid cursor")
+    try:
+        return datetime.fromisoformat(value), sort, last_id
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _load(kind, ids, user_id):
+    model = SOURCES[kind][0]
+    query = model.query.filter(model.user_id == user_id, model.id.in_(ids))
+    if model is Product:
+        query = query.options(joinedload(Product.category), joinedload(Product.warehouse))
+    return {row.id: row for row in query}
+
+
+def changes_since(user_id, since, args):
+    """Return one page of changes after the `since` cursor.
+
+    A single UNION ALL over the three tables and the tombstones picks the
+    next (timestamp, kind, id) positions from the (user_id, updated_at, id)
+    indexes; only those rows are then loaded.
+    """
+    limit = parse_limit(args)
+    cursor = _parse_since(since)
+
+    branches = []
+    for kind, (model, column) in SOURCES.items():
+        stmt = select(column.label('ts'), literal(kind).label('kind'), model.id.label('id')).where(model.user_id == user_id)
+        if cursor:
+            stmt = stmt.where(_after(column, model.id, kind, cursor))
+        branches.append(stmt)
+    merged = union_all(*branches).subquery()
+    positions = db.session.execute(
+        select(merged.c.ts, merged.c.kind, merged.c.id)
+        .order_by(merged.c.ts, merged.c.kind, merged.c.id)
+        .limit(limit + 1)
+    ).all()
+
+    has_more = len(positions) > limit
+    positions = positions[:limit]
+
+    by_kind = {}
+    for _, kind, id in positions:
+        by_kind.setdefault(kind, []).append(id)
+    loaded = {kind: _load(kind, ids, user_id) for kind, ids in by_kind.items()}
+
+    changes, deleted = [], []
+    for _, kind, id in positions:
+        row = loaded[kind].get(id)
+        if row is None:
+            continue
+        if kind == 'deleted':
+            deleted.append(row.to_dict())
+        else:
+            changes.append({"type": kind, "data": row.to_dict()})
+
+    if positions:
+        ts, kind, id = positions[-1]
+    elif cursor:
+        ts, kind, id = cursor
+    else:
+        ts, kind, id = datetime.min, '', 0
+    if not has_more:
+        horizon = datetime.utcnow() - SAFETY_WINDOW
+        if ts > horizon:
+            ts, kind, id = horizon, '', 0
+        if cursor and (ts, kind, id) < cursor:
+            ts, kind, id = cursor
+
+    return {
+        "changes": changes,
+        "deleted": deleted,
+        "next_cursor": encode_cursor(kind, ts, id),
+        "has_more": has_more
+    }
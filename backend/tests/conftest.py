@@ -0,0 +1,41 @@
+import os
+import pytest
+
+# Set before the app is imported, since app.py reads its config from the environment.
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    from models import db
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture(scope='session')
+def tenant(app):
+    """A user with a few categories, warehouses and products; returns its id."""
+    from models import db, User, Category, Warehouse
+    with app.app_context():
+        user = User(business_name='Test Ltd', username='tester', email='tester@example.com', password='password123')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([Category(name=f'Category {i}', user_id=user.id) for i in range(3)])
+        db.session.add_all([Warehouse(name=f'Warehouse {i}', location='Here', user_id=user.id) for i in range(2)])
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client, tenant):
+    response = client.post('/login', json={'username': 'tester', 'password': 'password123'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
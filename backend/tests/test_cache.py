@@ -0,0 +1,61 @@
+from sqlalchemy import update
+from auth import CurrentUser, TokenCache
+from models import db, Category, Product, User, Warehouse
+from stats import SUMMARY_VARIANTS, get_summary_cache
+
+
+def identity(user_id):
+    return CurrentUser(user_id, 'Test Ltd', f'user{user_id}', None, None)
+
+
+def test_token_cache_evicts_and_keeps_user_index():
+    cache = TokenCache(maxsize=2, ttl=60)
+    cache.set('a', identity(1), 3600)
+    cache.set('b', identity(1), 3600)
+    cache.set('c', identity(2), 3600)
+    assert cache.get('a') is None
+    assert cache._by_user == {1: {'b'}, 2: {'c'}}
+
+    cache.invalidate_user(1)
+    assert cache.get('b') is None and cache.get('c').id == 2
+    assert cache._by_user == {2: {'c'}}
+
+
+def test_token_cache_entry_expires_with_token():
+    cache = TokenCache(maxsize=10, ttl=60)
+    cache.set('a', identity(1), 0)
+    assert cache.get('a') is None
+    assert len(cache) == 0 and cache._by_user == {}
+
+
+def test_summary_variants_are_bounded(app, client, auth_headers, tenant):
+    for threshold in range(SUMMARY_VARIANTS * 3):
+        response = client.get(f'/stats/summary?low_stock_threshold={threshold}', headers=auth_headers)
+        assert response.status_code == 200
+    with app.app_context():
+        assert len(get_summary_cache().get(tenant)[1]) == SUMMARY_VARIANTS
+
+
+def test_negative_threshold_is_normalised(client, auth_headers):
+    response = client.get('/stats/summary?low_stock_threshold=-5', headers=auth_headers)
+    assert response.get_json()['low_stock_threshold'] == 0
+
+
+def test_summary_follows_writes_from_other_processes(app, client, auth_headers, tenant):
+    with app.app_context():
+        db.session.add(Product(
+            name='Counted', price=1.0, quantity=3, user_id=tenant,
+            category_id=db.session.query(Category.id).filter_by(user_id=tenant).first()[0],
+            warehouse_id=db.session.query(Warehouse.id).filter_by(user_id=tenant).first()[0]
+        ))
+        db.session.commit()
+    before = client.get('/stats/summary', headers=auth_headers).get_json()['total_quantity']
+    with app.app_context():
+        # What another worker or the jobs process leaves behind: rows and
+        # data_version change, but this process's on_tenant_change never runs.
+        with db.engine.begin() as conn:
+            conn.execute(update(Product).where(Product.user_id == tenant).values(quantity=Product.quantity + 1))
+            conn.execute(update(User).where(User.id == tenant).values(data_version=User.data_version + 1))
+        products = db.session.query(Product).filter_by(user_id=tenant).count()
+    after = client.get('/stats/summary', headers=auth_headers).get_json()['total_quantity']
+    assert products and after == before + products
@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.mark.parametrize('accept_encoding, compressed', [
+    ('gzip', True),
+    ('gzip, deflate, br', True),
+    ('br;q=1.0, gzip;q=0.5', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('identity', False),
+    ('', False),
+])
+def test_export_compresses_only_when_gzip_is_acceptable(client, auth_headers, accept_encoding, compressed):
+    headers = dict(auth_headers, **{'Accept-Encoding': accept_encoding})
+    response = client.get('/products/export?format=ndjson', headers=headers)
+    assert response.status_code == 200
+    assert (response.headers.get('Content-Encoding') == 'gzip') is compressed
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_ndjson_lines_are_compact(app, monkeypatch, use_orjson):
+    import exporter
+    import json_provider
+    if not use_orjson:
+        monkeypatch.setattr(exporter, 'orjson', None)
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip('orjson is not installed')
+    with app.app_context():
+        lines = list(exporter._ndjson_lines([{'id': 1, 'name': 'Widget'}]))
+    assert lines == ['{"id":1,"name":"Widget"}\n']
@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+from models import db, Category, Product, StockSnapshot, Warehouse
+from versions import touch_tenant
+
+
+def add_snapshots(tenant):
+    category_id = db.session.query(Category.id).filter_by(user_id=tenant).first()[0]
+    warehouse_id = db.session.query(Warehouse.id).filter_by(user_id=tenant).first()[0]
+    product = Product(name='Snapshotted', price=2.0, quantity=5, category_id=category_id,
+                      warehouse_id=warehouse_id, user_id=tenant)
+    db.session.add(product)
+    db.session.flush()
+    start = date(2026, 1, 5)
+    db.session.add_all(
+        [StockSnapshot(product_id=product.id, period='day', day=start + timedelta(days=i),
+                       quantity=i, value=2.0 * i, user_id=tenant) for i in range(5)]
+        + [StockSnapshot(product_id=product.id, period='week', day=start, quantity=9, value=18.0, user_id=tenant)]
+    )
+    touch_tenant(tenant)
+    db.session.commit()
+    return product.id
+
+
+def test_history_pages_follow_the_cursor(app, client, auth_headers, tenant):
+    with app.app_context():
+        product_id = add_snapshots(tenant)
+
+    seen, cursor = [], None
+    while True:
+        url = f'/products/{product_id}/history?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url, headers=auth_headers).get_json()
+        assert len(body['items']) <= 2
+        seen += [(item['day'], item['period']) for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == [('2026-01-05', 'day'), ('2026-01-05', 'week')] + [
+        ((date(2026, 1, 5) + timedelta(days=i)).isoformat(), 'day') for i in range(1, 5)
+    ]
+
+    response = client.get(f'/products/{product_id}/history?cursor=bogus', headers=auth_headers)
+    assert response.status_code == 400
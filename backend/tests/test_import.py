@@ -0,0 +1,52 @@
+import csv
+import json
+from models import db, Category, Product, Warehouse
+
+
+def product_id(app, tenant):
+    with app.app_context():
+        product = Product(
+            name='Priced', price=1.0, quantity=1, user_id=tenant,
+            category_id=db.session.query(Category.id).filter_by(user_id=tenant).first()[0],
+            warehouse_id=db.session.query(Warehouse.id).filter_by(user_id=tenant).first()[0]
+        )
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+
+
+def test_undecodable_upload_is_reported(client, auth_headers):
+    # Enough rows that the decoder reaches the bad bytes in a later chunk; they
+    # name no category, so each is read and reported without writing anything.
+    rows = b'Read,1.5,1,,Warehouse 0\n' * 1000
+    body = b'name,price,quantity,category,warehouse\n' + rows + b'Bad\xff\xfe,1,1,x,y\n'
+    response = client.post('/products/import?format=csv', headers=auth_headers, data=body)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert 0 < report['failed'] - 1 <= 1000
+    assert report['errors'][-1]['row'] is None
+    assert 'UTF-8' in report['errors'][-1]['error']
+
+
+def test_malformed_csv_is_reported(client, auth_headers):
+    huge = b'x' * (csv.field_size_limit() + 1)
+    body = b'name,price,quantity,category,warehouse\n' + huge + b',1,1,Category 0,Warehouse 0\n'
+    response = client.post('/products/import?format=csv', headers=auth_headers, data=body)
+    assert response.status_code == 200
+    assert response.get_json()['errors'][-1]['row'] is None
+
+
+def test_non_finite_prices_are_rejected(app, client, auth_headers, tenant, monkeypatch):
+    import json_provider
+    monkeypatch.setattr(json_provider, 'orjson', None)  # the stdlib parser accepts Infinity and NaN
+    id = product_id(app, tenant)
+    headers = dict(auth_headers, **{'Content-Type': 'application/json'})
+    for price in ('Infinity', 'NaN'):
+        response = client.patch(f'/products/{id}', headers=headers, data=f'{{"price": {price}}}')
+        assert response.status_code == 400
+    assert client.get(f'/products/{id}', headers=auth_headers).get_json()['price'] == 1.0
+
+    rows = '\n'.join(json.dumps({'name': 'Inf', 'price': price, 'category': 'Category 0', 'warehouse': 'Warehouse 0'})
+                     for price in ('inf', 'nan'))
+    report = client.post('/products/import?format=ndjson', headers=auth_headers, data=rows).get_json()
+    assert report['inserted'] == 0 and report['failed'] == 2
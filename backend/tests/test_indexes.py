@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from models import db
+from pagination import encode_cursor
+
+
+@contextmanager
+def captured_statements(app):
+    """Collect (sql, parameters) for every statement run inside the block."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+
+def list_query_plan(app, client, headers, path):
+    """EXPLAIN QUERY PLAN of the page query GET /products actually ran for `path`."""
+    with captured_statements(app) as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    sql, parameters = next(
+        (sql, parameters) for sql, parameters in statements
+        if 'FROM products' in sql and 'LIMIT' in sql
+    )
+    with app.app_context():
+        with db.engine.connect() as conn:
+            return [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parameters)]
+
+
+@pytest.mark.parametrize('path, index', [
+    ('/products', 'ix_products_user_id_id'),
+    (f"/products?cursor={encode_cursor('id', 10, 10)}", 'ix_products_user_id_id'),
+    ('/products?sort=-id', 'ix_products_user_id_id'),
+    ('/products?sort=created_at', 'ix_products_user_id_created_at_id'),
+    (f"/products?sort=created_at&cursor={encode_cursor('created_at', datetime(2026, 1, 1), 10)}",
+     'ix_products_user_id_created_at_id'),
+    ('/products?sort=-created_at', 'ix_products_user_id_created_at_id'),
+    ('/products?category_id=1', 'ix_products_user_id_category_id'),
+    ('/products?warehouse_id=1', 'ix_products_user_id_warehouse_id'),
+])
+def test_product_list_uses_composite_indexes(app, client, auth_headers, path, index):
+    plan = list_query_plan(app, client, auth_headers, path)
+    assert any(index in step for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+def test_low_stock_list_uses_the_quantity_index(app, client, auth_headers):
+    # A quantity range can't also give id order, so this one sorts its (few) rows
+    plan = list_query_plan(app, client, auth_headers, '/products?low_stock=1')
+    assert any('ix_products_user_id_quantity' in step for step in plan), plan
@@ -0,0 +1,26 @@
+from models import db, Category, Product, Warehouse
+
+
+def add_product(tenant, quantity):
+    category_id = db.session.query(Category.id).filter_by(user_id=tenant).first()[0]
+    warehouse_id = db.session.query(Warehouse.id).filter_by(user_id=tenant).first()[0]
+    product = Product(name='Moved', price=1.0, quantity=quantity, category_id=category_id,
+                      warehouse_id=warehouse_id, user_id=tenant)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def test_movements_apply_in_the_order_sent(app, client, auth_headers, tenant):
+    with app.app_context():
+        target = add_product(tenant, 0)
+        source = add_product(tenant, 5)
+
+    response = client.post('/movements', headers=auth_headers, json=[
+        {'kind': 'transfer', 'quantity': 5, 'product_id': source, 'target_product_id': target},
+        {'kind': 'pick', 'quantity': 5, 'product_id': target}
+    ])
+    assert response.status_code == 201
+    assert [(m['product_id'], m['quantity_after']) for m in response.get_json()] == [
+        (source, 0), (target, 5), (target, 0)
+    ]
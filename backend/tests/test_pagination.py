@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from sqlalchemy import update
+from models import db, Category, Product, Warehouse
+from pagination import encode_cursor
+
+
+def crafted_cursor(sort, value, id=1):
+    payload = json.dumps({"s": sort, "v": value, "id": id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('sort, cursor', [
+    ('price', crafted_cursor('price', {"a": 1})),
+    ('price', crafted_cursor('price', 'cheap')),
+    ('price', crafted_cursor('price', float('nan'))),
+    ('quantity', crafted_cursor('quantity', 1.5)),
+    ('quantity', crafted_cursor('quantity', True)),
+    ('name', crafted_cursor('name', [1, 2])),
+    ('created_at', crafted_cursor('created_at', 'yesterday')),
+    ('created_at', crafted_cursor('created_at', 20240101)),
+    ('id', 'not-a-cursor'),
+])
+def test_malformed_cursor_is_a_generic_400(client, auth_headers, sort, cursor):
+    response = client.get(f'/products?sort={sort}&cursor={cursor}', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+@pytest.mark.parametrize('sort, value', [
+    ('price', 2), ('price', 2.5), ('quantity', 3), ('name', 'b'), ('created_at', datetime(2024, 1, 1, 12, 30))
+])
+def test_well_formed_cursor_is_accepted(client, auth_headers, sort, value):
+    response = client.get(f'/products?sort={sort}&cursor={encode_cursor(sort, value, 1)}', headers=auth_headers)
+    assert response.status_code == 200
+
+
+def walk(client, headers, path):
+    ids, cursor = [], None
+    while True:
+        body = client.get(path + (f'&cursor={cursor}' if cursor else ''), headers=headers).get_json()
+        ids += [item['id'] for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_null_sort_values_page_through(app, client, auth_headers, tenant):
+    with app.app_context():
+        category_id = db.session.query(Category.id).filter_by(user_id=tenant).first()[0]
+        warehouse_id = db.session.query(Warehouse.id).filter_by(user_id=tenant).first()[0]
+        products = [Product(name=f'Dated {i}', price=1.0, quantity=1, category_id=category_id,
+                            warehouse_id=warehouse_id, user_id=tenant) for i in range(5)]
+        db.session.add_all(products)
+        db.session.commit()
+        db.session.execute(
+            update(Product).where(Product.id.in_([p.id for p in products[::2]])).values(created_at=None)
+        )
+        db.session.commit()
+        rows = db.session.query(Product.id, Product.created_at).filter_by(user_id=tenant).all()
+
+    dated = sorted((r for r in rows if r.created_at is not None), key=lambda r: (r.created_at, r.id))
+    undated = sorted(r.id for r in rows if r.created_at is None)
+    ascending = [r.id for r in dated] + undated
+    assert walk(client, auth_headers, '/products?sort=created_at&limit=2') == ascending
+    assert walk(client, auth_headers, '/products?sort=-created_at&limit=2') == ascending[::-1]
+
+
+def test_null_cursor_on_a_not_null_column_is_a_400(client, auth_headers):
+    response = client.get(f"/products?sort=price&cursor={encode_cursor('price', None, 1)}", headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from sqlalchemy import event, insert
+from models import db, Product, Category, Warehouse
+from versions import touch_tenant
+
+
+@contextmanager
+def count_queries(app):
+    """Collect the SQL statements run inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def add_products(app, user_id, count):
+    with app.app_context():
+        category_id = db.session.query(Category.id).filter_by(user_id=user_id).first()[0]
+        warehouse_id = db.session.query(Warehouse.id).filter_by(user_id=user_id).first()[0]
+        start = db.session.query(Product).filter_by(user_id=user_id).count()
+        db.session.execute(insert(Product), [
+            dict(name=f'Product {start + i}', price=1.5, quantity=i, category_id=category_id,
+                 warehouse_id=warehouse_id, user_id=user_id)
+            for i in range(count)
+        ])
+        touch_tenant(user_id)
+        db.session.commit()
+
+
+def add_categories(app, user_id, count):
+    with app.app_context():
+        start = db.session.query(Category).filter_by(user_id=user_id).count()
+        db.session.execute(insert(Category), [
+            dict(name=f'Extra category {start + i}', user_id=user_id) for i in range(count)
+        ])
+        touch_tenant(user_id)
+        db.session.commit()
+
+
+def list_query_count(app, client, headers, path):
+    """Statements for one GET right after a write, so the reference cache has to reload."""
+    client.get('/users', headers=headers)  # the token is cached from here on
+    with count_queries(app) as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return len(statements), len(response.get_json()['items'])
+
+
+def test_product_list_runs_a_fixed_number_of_queries(app, client, auth_headers, tenant):
+    add_products(app, tenant, 5)
+    few, few_items = list_query_count(app, client, auth_headers, '/products?limit=200')
+    add_products(app, tenant, 100)
+    many, many_items = list_query_count(app, client, auth_headers, '/products?limit=200')
+    assert many_items == few_items + 100
+    assert many == few
+    assert few <= 4
+
+
+def test_category_list_runs_a_fixed_number_of_queries(app, client, auth_headers, tenant):
+    add_categories(app, tenant, 5)
+    few, few_items = list_query_count(app, client, auth_headers, '/categories?limit=200')
+    add_categories(app, tenant, 50)
+    many, many_items = list_query_count(app, client, auth_headers, '/categories?limit=200')
+    assert many_items == few_items + 50
+    assert many == few
+    assert few <= 2
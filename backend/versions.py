@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import hashlib
+from flask import g, request, make_response
+from sqlalchemy import event, select, update
+from models import db, User
+
+_change_listeners = []
+
+
+def on_tenant_change(callback):
+    """Register callback(user_id) to run after a commit that touched the tenant's data."""
+    _change_listeners.append(callback)
+    return callback
+
+
+def touch_tenant(user_id):
+    """Mark the tenant's data as changed by the current transaction.
+
+    The version bump itself is issued just before COMMIT, so the users
+    row lock is held only for the commit and not across the request.
+    """
+    db.session.info.setdefault('touched_tenants', set()).add(user_id)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _bump_versions(session):
+    now = datetime.utcnow()
+    for user_id in sorted(session.info.get('touched_tenants', ())):
+        session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(data_version=User.data_version + 1, data_updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def notify_tenant_change(user_id):
+    """Run the on_tenant_change callbacks for a tenant."""
+    for callback in _change_listeners:
+        callback(user_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _notify_changes(session):
+    for user_id in session.info.pop('touched_tenants', ()):
+        notify_tenant_change(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('touched_tenants', None)
+
+
+def current_version(user_id):
+    """Return (version, last modified) for a tenant without loading any of its rows."""
+    row = db.session.query(User.data_version, User.data_updated_at, User.created_at).filter(User.id == user_id).first()
+    if row is None:
+        return 0, None
+    version, updated_at, created_at = row
+    return version or 0, updated_at or created_at
+
+
+def written_within(user_id, seconds):
+    """Whether the tenant's data changed in the last `seconds`, as seen on the primary."""
+    updated_at = db.session.execute(
+        select(User.data_updated_at).where(User.id == user_id),
+        bind_arguments={'bind': db.engine}
+    ).scalar()
+    return updated_at is not None and updated_at > datetime.utcnow() - timedelta(seconds=seconds)
+
+
+def conditional(f):
+    """Answer GETs with a strong ETag and Last-Modified, and 304 when the client is current.
+
+    The check runs before the wrapped handler, so an unchanged tenant
+    costs one primary-key lookup and no row loading or serialization.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return f(current_user, *args, **kwargs)
+
+        version, updated_at = current_version(current_user.id)
+        g.tenant_version = version
+        path = hashlib.sha1(request.full_path.encode()).hexdigest()[:12]
+        etag = f'{current_user.id}-{version}-{path}'
+        if updated_at is not None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            since = request.if_modified_since
+            not_modified = since is not None and updated_at is not None and updated_at <= since
+
+        response = make_response(('', 304) if not_modified else f(current_user, *args, **kwargs))
+        if response.status_code in (200, 304):
+            response.set_etag(etag)
+            response.last_modified = updated_at
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return decorated
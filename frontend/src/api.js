@@ -0,0 +1,20 @@
+// Fetch every item of a paginated list endpoint (e.g. /categories),
+// following next_cursor until the last page.
+export async function fetchAllPages(url, headers) {
+    const items = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams({ limit: 200 });
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`${url}?${params}`, { headers });
+        if (!res.ok) {
+            const error = new Error(`Request to ${url} failed with ${res.status}`);
+            error.status = res.status;
+            throw error;
+        }
+        const data = await res.json();
+        items.push(...data.items);
+        cursor = data.next_cursor;
+    } while (cursor);
+    return items;
+}
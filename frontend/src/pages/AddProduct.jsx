@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
+import { fetchAllPages } from '../api';
 
 function AddProduct() {
     const [categories, setCategories] = useState([]);
@@ -49,20 +50,17 @@ function AddProduct() {
                 "Authorization": `Bearer ${token}`,
                 "Content-Type": "application/json"
             };
-            const [categoriesRes, warehousesRes] = await Promise.all([
-                fetch(`${API_URL}/categories`, { headers }),
-                fetch(`${API_URL}/warehouses`, { headers })
+            const [categoryItems, warehouseItems] = await Promise.all([
+                fetchAllPages(`${API_URL}/categories`, headers),
+                fetchAllPages(`${API_URL}/warehouses`, headers)
             ]);
-            if (!categoriesRes.ok || !warehousesRes.ok) {
-                console.error('Failed to fetch dropdown data');
+            setCategories(categoryItems);
+            setWarehouses(warehouseItems);
+        } catch (error) {
+            console.error('Failed to fetch dropdown data:', error);
+            if (error.status) {
                 navigate('/login');
-                return;
             }
-
-            setCategories(await categoriesRes.json());
-            setWarehouses(await warehousesRes.json());
-        } catch (error) {
-            console.error('Error fetching dropdown data:', error);
         }
     };
 
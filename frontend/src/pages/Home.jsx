@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import CategoryCard from '../components/CategoryCard';
 import WarehouseCard from '../components/WarehouseCard';
 import { useAuth } from '../context/AuthContext';  
+import { fetchAllPages } from '../api';
 
 function Home() {
       const { user } = useAuth();
@@ -28,18 +29,18 @@ function Home() {
                 "Authorization": `Bearer ${token}`,
                 "Content-Type": "application/json"
             };
-            const [categoriesRes, warehousesRes, statsRes] = await Promise.all([
-                fetch(`${API_URL}/categories`, { headers }),
-                fetch(`${API_URL}/warehouses`, { headers }),
+            const [categoryItems, warehouseItems, statsRes] = await Promise.all([
+                fetchAllPages(`${API_URL}/categories`, headers),
+                fetchAllPages(`${API_URL}/warehouses`, headers),
                 fetch(`${API_URL}/stats`, { headers })
             ]);
-            if (!categoriesRes.ok || !warehousesRes.ok || !statsRes.ok) {
+            if (!statsRes.ok) {
             console.error("Unauthorized or failed request");
             return;
         }
 
-            setCategories(await categoriesRes.json());
-            setWarehouses(await warehousesRes.json());
+            setCategories(categoryItems);
+            setWarehouses(warehouseItems);
             setStats(await statsRes.json());
         } catch (error) {
             console.error('Error fetching data:', error);
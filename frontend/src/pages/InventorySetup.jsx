@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
+import { fetchAllPages } from '../api';
 
 function InventorySetup() {
     const [activeTab, setActiveTab] = useState('warehouse'); // 'warehouse' or 'category'
@@ -43,13 +44,7 @@ function InventorySetup() {
     // Fetch warehouses
     const fetchWarehouses = async () => {
         try {
-            const res = await fetch(`${API_URL}/warehouses`, { headers });
-            if (!res.ok) {
-                console.error('Failed to fetch warehouses');
-                return;
-            }
-            const data = await res.json();
-            setWarehouses(data);
+            setWarehouses(await fetchAllPages(`${API_URL}/warehouses`, headers));
         } catch (error) {
             console.error('Error fetching warehouses:', error);
         }
@@ -58,13 +53,7 @@ function InventorySetup() {
     // Fetch categories
     const fetchCategories = async () => {
         try {
-            const res = await fetch(`${API_URL}/categories`, { headers });
-            if (!res.ok) {
-                console.error('Failed to fetch categories');
-                return;
-            }
-            const data = await res.json();
-            setCategories(data);
+            setCategories(await fetchAllPages(`${API_URL}/categories`, headers));
         } catch (error) {
             console.error('Error fetching categories:', error);
         }
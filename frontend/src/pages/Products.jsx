@@ -4,6 +4,7 @@ import ProductCard from '../components/ProductCard';
 
 function Products() {
     const [products, setProducts] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const navigate = useNavigate();
 
     const API_URL = import.meta.env.VITE_API_URL;
@@ -13,7 +14,7 @@ function Products() {
         fetchProducts();
     }, []);
 
-    const fetchProducts = async () => {
+    const fetchProducts = async (cursor = null) => {
         try {
             const token = localStorage.getItem('token');
             if (!token) {
@@ -21,7 +22,8 @@ function Products() {
                 navigate ('/login');
                 return;
             }
-            const response = await fetch(`${API_URL}/products`,{
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+            const response = await fetch(`${API_URL}/products${query}`,{
             headers:{
                 "Authorization": `Bearer ${token}`,
                 "Content-Type": "application/json"
@@ -33,7 +35,8 @@ function Products() {
        return;
     }
             const data = await response.json();
-            setProducts(data);
+            setProducts(prev => cursor ? [...prev, ...data.items] : data.items);
+            setNextCursor(data.next_cursor);
         } catch (error) {
             console.error('Error fetching products:', error);
         }
@@ -80,6 +83,12 @@ function Products() {
                     />
                 ))}
             </div>
+
+            {nextCursor && (
+                <button onClick={() => fetchProducts(nextCursor)} className="add-btn">
+                    Load More
+                </button>
+            )}
         </div>
     );
 }